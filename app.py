@@ -32,6 +32,8 @@ MAPPINGS_FILE = os.path.join(SCRIPTS_DIR, "key_mappings.json")
 MOUSE_CONTROLLER_SCRIPT = os.path.join(WORKSPACE_ROOT, "virtual-controlls", "edu-hcare.py")
 AIR_CONTROLLER_SCRIPT = os.path.join(WORKSPACE_ROOT, "virtual-controlls", "air-controller.py")
 AGENT_SCRIPT = os.path.join(WORKSPACE_ROOT, "Agentic-AI", "agent_cmds.py")
+# Power state files written by the running camera processes (see virtual-controlls/power_states.py)
+POWER_STATE_DIR = os.path.join(WORKSPACE_ROOT, "virtual-controlls", "runtime")
 
 # Voice recognition scripts
 VOICE_DIR = os.path.join(WORKSPACE_ROOT, "Agentic-AI")
@@ -90,6 +92,27 @@ def get_gestures():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/power_states')
+def power_states():
+    try:
+        processes = []
+        if os.path.isdir(POWER_STATE_DIR):
+            for file in sorted(os.listdir(POWER_STATE_DIR)):
+                # Skip the latency dumps that live next to the state files
+                if not file.endswith('.json') or file.endswith('-latency.json'):
+                    continue
+                try:
+                    with open(os.path.join(POWER_STATE_DIR, file), 'r') as f:
+                        state = json.load(f)
+                except (json.JSONDecodeError, OSError):
+                    continue
+                # A crashed process leaves its last state file behind
+                state['running'] = psutil.pid_exists(state.get('pid', -1))
+                processes.append(state)
+        return jsonify({"status": "success", "processes": processes})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)})
+
 @app.route('/update_mapping', methods=['POST'])
 def update_mapping():
     try:
@@ -112,9 +135,11 @@ def update_mapping():
         # Update mapping
         mappings[gesture_name] = new_key
         
-        # Save mappings
-        with open(MAPPINGS_FILE, 'w') as f:
+        # Save mappings atomically; running predict_live processes reload them on change
+        tmp_path = MAPPINGS_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
             json.dump(mappings, f, indent=4)
+        os.replace(tmp_path, MAPPINGS_FILE)
         
         return jsonify({
             "status": "success",
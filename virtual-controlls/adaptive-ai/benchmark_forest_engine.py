@@ -0,0 +1,73 @@
+import os
+import time
+import argparse
+import numpy as np
+import joblib
+
+from forest_engine import CompiledForest
+from dataset_cache import load_dataset
+from features import compute_features
+from model_bundle import load_pickle_features
+
+WORKSPACE_ROOT = os.path.abspath(os.path.dirname(__file__))
+MODELS_DIR = os.path.join(WORKSPACE_ROOT, "models")
+DATA_DIR = os.path.join(WORKSPACE_ROOT, "DATA")
+
+
+def load_samples(data_dir, limit):
+    """Flattened landmark rows from the recorded gesture samples"""
+    landmarks = load_dataset(data_dir, verbose=False).landmarks[:limit]
+    return np.asarray(landmarks, dtype=np.float64).reshape(len(landmarks), -1)
+
+
+def time_per_call(func, rows, repeats):
+    """Mean seconds per call of func over single-row inputs"""
+    start = time.perf_counter()
+    for i in range(repeats):
+        func(rows[i % len(rows)])
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled forest against sklearn predict_proba')
+    parser.add_argument('--samples', type=int, default=1000, help='Number of recorded samples to check')
+    parser.add_argument('--repeats', type=int, default=200, help='Single-row calls timed per engine')
+    args = parser.parse_args()
+
+    model = joblib.load(os.path.join(MODELS_DIR, "gesture_model.pkl"))
+    scaler = joblib.load(os.path.join(MODELS_DIR, "scaler.pkl"))
+    feature_set, feature_columns, _ = load_pickle_features(MODELS_DIR, scaler)
+    forest = CompiledForest.from_sklearn(model)
+    print(f"Compiled {forest.n_trees} trees, {forest.n_nodes} nodes, max depth {forest.max_depth}")
+
+    features = compute_features(load_samples(DATA_DIR, args.samples), feature_set)
+    if feature_columns is not None:
+        features = features[:, feature_columns]
+    X = scaler.transform(features).astype(np.float32)
+    print(f"Checking {len(X)} samples from {DATA_DIR}")
+
+    # Identical outputs: same leaf in every tree and the same averaged probabilities
+    same_leaves = np.array_equal(
+        model.apply(X), forest.apply(X) - forest.roots)
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X).copy()
+    max_diff = np.abs(expected - actual).max()
+    same_labels = np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1))
+    print(f"Leaves identical: {same_leaves}")
+    print(f"Max |proba difference|: {max_diff:.3e}")
+    print(f"Predicted labels identical: {same_labels}")
+
+    rows = [X[i:i+1] for i in range(len(X))]
+    sklearn_time = time_per_call(model.predict_proba, rows, max(args.repeats // 10, 1))
+    compiled_time = time_per_call(forest.predict_proba, rows, args.repeats)
+    print("\nSingle-row latency:")
+    print(f"sklearn predict_proba:  {sklearn_time * 1e3:.3f} ms")
+    print(f"CompiledForest:         {compiled_time * 1e3:.3f} ms")
+    print(f"Speedup:                {sklearn_time / compiled_time:.1f}x")
+
+    if not (same_leaves and same_labels and max_diff < 1e-12):
+        raise SystemExit("Compiled forest output does not match sklearn")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,12 @@ import os
 import mediapipe as mp
 import argparse
 import json
+import sys
+
+# Camera front-end modules shared with the mouse controllers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hand_tracking import RoiHandTracker
+from motion_gate import MotionGate
 
 def main():
     # Parse command line arguments
@@ -13,7 +19,8 @@ def main():
 
     # Initialize MediaPipe
     mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
+    hands = RoiHandTracker(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
+    motion_gate = MotionGate(hands)
     mp_draw = mp.solutions.drawing_utils
 
     # Create output directory if it doesn't exist
@@ -44,13 +51,17 @@ def main():
 
         # Convert the BGR image to RGB
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
+        results, skipped = motion_gate.process(rgb_frame)
 
         if results.multi_hand_landmarks:
             for hand_landmarks in results.multi_hand_landmarks:
                 # Draw hand landmarks
                 mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
+                # A skipped frame repeats the last landmarks; don't save duplicates
+                if skipped:
+                    continue
+
                 # Extract landmark coordinates
                 landmarks = []
                 for lm in hand_landmarks.landmark:
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import argparse
+from collections import namedtuple
+import numpy as np
+
+CACHE_DIRNAME = ".dataset_cache"
+MANIFEST_NAME = "manifest.json"
+
+# One .npy file per column; row i of every column is the same sample file.
+# Every build writes its columns under a new build id and commits them by
+# replacing the manifest, which names the build, its row count and the
+# files that were skipped. A build interrupted before that leaves the
+# previous cache in place. Only the build a manifest replaced is removed;
+# uncommitted columns, possibly of a build still being written by another
+# process, are kept until they are ABANDONED_AFTER seconds old.
+COLUMNS = ("landmarks", "labels", "paths", "mtimes", "sizes")
+ABANDONED_AFTER = 3600
+
+Dataset = namedtuple("Dataset", "landmarks labels paths")
+
+
+def scan_samples(base_dir):
+    """{'<label>/<file>.json': (label, mtime_ns, size)} for every sample file under base_dir"""
+    found = {}
+    for label_entry in sorted(os.scandir(base_dir), key=lambda e: e.name):
+        if label_entry.name.startswith(".") or not label_entry.is_dir():
+            continue
+        for entry in sorted(os.scandir(label_entry.path), key=lambda e: e.name):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                found[f"{label_entry.name}/{entry.name}"] = (label_entry.name, stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def parse_sample(path):
+    """(21, 3) float32 landmarks of one sample file, or the reason it cannot be used"""
+    try:
+        with open(path) as f:
+            sample = json.load(f)
+    except json.JSONDecodeError:
+        return None, "Could not parse JSON"
+    except OSError as e:
+        return None, f"Could not read file ({e.strerror})"
+    if not isinstance(sample, dict) or "landmarks" not in sample:
+        return None, "No landmarks found"
+    try:
+        landmarks = np.asarray(sample["landmarks"], dtype=np.float32)
+    except (ValueError, TypeError):
+        return None, "Malformed landmarks"
+    if landmarks.shape != (21, 3):
+        return None, f"Expected 21 landmarks, got shape {landmarks.shape}"
+    return landmarks, None
+
+
+def column_path(cache_dir, name, build):
+    return os.path.join(cache_dir, f"{name}-{build}.npy")
+
+
+def committed_build(cache_dir):
+    """Build id named by the manifest, or None"""
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            return json.load(f)["build"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def read_cache(cache_dir):
+    """(memory-mapped columns, skipped files) of the committed build, or None"""
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        build = manifest["build"]
+        columns = {name: np.load(column_path(cache_dir, name, build), mmap_mode="r") for name in COLUMNS}
+        skipped = {path: tuple(stamp) for path, stamp in manifest["skipped"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if any(len(column) != manifest["rows"] for column in columns.values()):
+        return None
+    return columns, skipped
+
+
+def _write_build(cache_dir, columns, skipped):
+    """Write a new build, commit it by replacing the manifest and return its id"""
+    os.makedirs(cache_dir, exist_ok=True)
+    build = f"{time.time_ns()}-{os.getpid()}"
+    for name in COLUMNS:
+        np.save(column_path(cache_dir, name, build), columns[name])
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump({"build": build, "rows": len(columns["paths"]), "skipped": skipped}, f)
+    superseded = committed_build(cache_dir)
+    os.replace(tmp_path, manifest_path)
+
+    # The replaced build is no longer referenced; other builds may still be committed by their writer
+    abandoned_before = time.time_ns() - ABANDONED_AFTER * 10**9
+    for file in os.listdir(cache_dir):
+        if not file.endswith(".npy"):
+            continue
+        file_build = file[:-len(".npy")].partition("-")[2]
+        try:
+            started = int(file_build.split("-")[0])
+        except ValueError:
+            started = 0
+        if file_build == superseded or (file_build != build and started < abandoned_before):
+            try:
+                os.remove(os.path.join(cache_dir, file))
+            except OSError:
+                pass
+    return build
+
+
+def load_dataset(base_dir, cache_dir=None, rebuild=False, verbose=True):
+    """All DATA/<label>/*.json samples as a Dataset of memory-mapped columns.
+
+    landmarks is (N, 21, 3) float32, labels and paths are string arrays.
+    The columns live in `cache_dir` (base_dir/.dataset_cache by default);
+    only sample files that are new or whose mtime or size changed since the
+    last build are parsed, and an unchanged tree is not rewritten at all.
+    """
+    cache_dir = cache_dir or os.path.join(base_dir, CACHE_DIRNAME)
+    started = time.perf_counter()
+    found = scan_samples(base_dir)
+    cached = None if rebuild else read_cache(cache_dir)
+    cached, skipped = cached if cached is not None else (None, {})
+
+    cached_rows = {}
+    if cached is not None:
+        cached_rows = {str(path): i for i, path in enumerate(cached["paths"])}
+
+    reused, parsed, new_skipped = {}, {}, {}
+    for path, (label, mtime, size) in found.items():
+        row = cached_rows.get(path)
+        if row is not None and cached["mtimes"][row] == mtime and cached["sizes"][row] == size:
+            reused[path] = row
+        elif skipped.get(path) == (mtime, size):
+            new_skipped[path] = (mtime, size)
+        else:
+            landmarks, problem = parse_sample(os.path.join(base_dir, path))
+            if landmarks is None:
+                if verbose:
+                    print(f"Warning: {problem} in {path}, skipping...")
+                new_skipped[path] = (mtime, size)
+            else:
+                parsed[path] = landmarks
+
+    removed = sum(1 for path in cached_rows if path not in found)
+    changed = sum(1 for path in parsed if path in cached_rows)
+    if cached is not None and not parsed and not removed and new_skipped == skipped:
+        if verbose:
+            print(f"Dataset cache: {len(reused)} samples up to date ({time.perf_counter() - started:.2f}s)")
+        return Dataset(cached["landmarks"], cached["labels"], cached["paths"])
+
+    # Rebuild every column in scan order from reused rows and freshly parsed files
+    paths = [path for path in found if path in reused or path in parsed]
+    landmarks = np.empty((len(paths), 21, 3), dtype=np.float32)
+    for i, path in enumerate(paths):
+        landmarks[i] = cached["landmarks"][reused[path]] if path in reused else parsed[path]
+    columns = {
+        "landmarks": landmarks,
+        "labels": np.array([found[path][0] for path in paths], dtype=np.str_),
+        "paths": np.array(paths, dtype=np.str_),
+        "mtimes": np.array([found[path][1] for path in paths], dtype=np.int64),
+        "sizes": np.array([found[path][2] for path in paths], dtype=np.int64),
+    }
+    # Drop the old maps before their files are removed
+    cached = None
+    build = _write_build(cache_dir, columns, new_skipped)
+
+    if verbose:
+        print(f"Dataset cache: {len(parsed) - changed} new, {changed} changed, {removed} removed, "
+              f"{len(reused)} reused ({time.perf_counter() - started:.2f}s)")
+    # Serve the new build memory-mapped rather than holding every column in memory
+    try:
+        columns = {name: np.load(column_path(cache_dir, name, build), mmap_mode="r")
+                   for name in ("landmarks", "labels", "paths")}
+    except (OSError, ValueError):
+        pass  # Already superseded and removed by a concurrent build: keep the columns built here
+    return Dataset(columns["landmarks"], columns["labels"], columns["paths"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or refresh the columnar cache of a gesture DATA directory')
+    parser.add_argument('data_dir', help='Directory with the <gesture>/*.json samples')
+    parser.add_argument('--rebuild', action='store_true', help='Parse every sample file again')
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data_dir, rebuild=args.rebuild)
+    labels, counts = np.unique(dataset.labels, return_counts=True)
+    for label, count in zip(labels, counts):
+        print(f"{label}: {count}")
+
+
+if __name__ == "__main__":
+    main()
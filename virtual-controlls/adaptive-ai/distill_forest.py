@@ -0,0 +1,162 @@
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import itertools
+from datetime import datetime
+import numpy as np
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.ensemble import RandomForestClassifier
+
+from train_gesture_model import (GESTURE_TYPES, FOREST_PARAMS, load_gesture_split, build_training_matrix,
+                                 single_row_latency)
+from retrain_personalized import bundle_accuracy
+from model_bundle import ModelBundle
+from finger_rules import learn_rule_table
+from features import FEATURE_WIDTHS, compute_features, landmark_scale
+
+WORKSPACE_ROOT = os.path.abspath(os.path.dirname(__file__))
+DATA_DIR = os.path.join(WORKSPACE_ROOT, "DATA")
+BUNDLE_PATH = os.path.join(WORKSPACE_ROOT, "models", "gesture_model.bundle")
+
+# Student forests tried against the full FOREST_PARAMS teacher. ccp_alpha is
+# sklearn's cost-complexity pruning: subtrees whose split does not pay for
+# itself are merged into one leaf.
+SEARCH_GRID = {
+    "n_estimators": (10, 20, 40, 60, 100),
+    "max_depth": (4, 6, 8, 10),
+    "ccp_alpha": (0.0, 0.002, 0.005),
+}
+# Every grid point is tried on each feature set; invariant features cost more
+# per frame but can let a much smaller forest keep the accuracy
+FEATURE_SETS = ("raw", "invariant")
+
+
+def artifact_size(bundle):
+    """Bytes the bundle takes on disk"""
+    fd, path = tempfile.mkstemp(suffix=".bundle")
+    os.close(fd)
+    try:
+        bundle.save(path)
+        return os.path.getsize(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def evaluate(clf, scaler, classes, rule_table, params, test_samples, test_labels,
+             feature_set="raw", raw_scale=None):
+    bundle = ModelBundle.from_sklearn(clf, scaler, classes, rule_table=rule_table,
+                                      feature_set=feature_set, landmark_scale=raw_scale)
+    return bundle, {
+        "params": params,
+        "feature_set": feature_set,
+        "accuracy": bundle_accuracy(bundle, test_samples, test_labels),
+        "latency_ms": single_row_latency(bundle, test_samples) * 1000,
+        "size_kb": artifact_size(bundle) / 1024,
+        "n_nodes": bundle.forest.n_nodes,
+    }
+
+
+def distill(data_dir, tolerance=0.01, grid=SEARCH_GRID, feature_sets=FEATURE_SETS,
+            transfer_augment=5, seed=42, verbose=True):
+    """Search smaller forests and return (smallest bundle within tolerance, report)"""
+    train_samples, train_labels, test_samples, test_labels = load_gesture_split(data_dir, GESTURE_TYPES,
+                                                                                verbose=False)
+    if len(train_samples) == 0 or len(test_samples) == 0:
+        raise ValueError("No valid samples were loaded")
+    train_samples = np.asarray(train_samples, dtype=np.float64)
+
+    # Tested on the fixed validation split; augmentation is applied to the training part only
+    np.random.seed(seed)
+    X_train, y_train = build_training_matrix(train_samples, train_labels)
+    scaler = StandardScaler().fit(X_train)
+    le = LabelEncoder().fit(y_train)
+    rule_table = learn_rule_table(X_train, le.transform(y_train), len(le.classes_))
+
+    # Teacher: the full forest train_gesture_model.py ships
+    teacher = RandomForestClassifier(**FOREST_PARAMS).fit(scaler.transform(X_train), le.transform(y_train))
+    teacher_params = {name: FOREST_PARAMS[name] for name in grid if name in FOREST_PARAMS}
+    teacher_bundle, teacher_result = evaluate(teacher, scaler, le.classes_, rule_table, teacher_params,
+                                              test_samples, test_labels)
+
+    # Students learn the teacher's decisions on a larger augmented transfer set
+    X_transfer, _ = build_training_matrix(train_samples, train_labels, n_augmented=transfer_augment)
+    y_transfer = teacher.predict(scaler.transform(X_transfer))
+
+    floor = teacher_result["accuracy"] - tolerance
+    best_bundle, best = teacher_bundle, dict(teacher_result, teacher=True)
+    results = []
+    for feature_set in feature_sets:
+        raw_scale = landmark_scale(X_transfer, feature_set)
+        student_scaler = StandardScaler()
+        features = student_scaler.fit_transform(compute_features(X_transfer, feature_set))
+        for values in itertools.product(*grid.values()):
+            params = dict(zip(grid.keys(), values))
+            clf = RandomForestClassifier(**dict(FOREST_PARAMS, **params)).fit(features, y_transfer)
+            bundle, result = evaluate(clf, student_scaler, le.classes_, rule_table, params,
+                                      test_samples, test_labels, feature_set, raw_scale)
+            results.append(result)
+            if verbose:
+                print(f"{feature_set} {params}: accuracy {result['accuracy']:.3f}, "
+                      f"{result['latency_ms']:.3f} ms, {result['size_kb']:.1f} KB")
+            if result["accuracy"] >= floor and result["size_kb"] < best["size_kb"]:
+                best_bundle, best = bundle, result
+
+    best_bundle.metadata = {
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "n_samples": int(len(X_transfer)),
+        "test_accuracy": best["accuracy"],
+        "teacher_accuracy": teacher_result["accuracy"],
+        "distilled": not best.get("teacher", False),
+        "feature_set": best["feature_set"],
+        # Personalized retraining keeps this forest shape
+        "forest_params": best["params"],
+        **best["params"],
+    }
+    report = {
+        "teacher": teacher_result,
+        "chosen": best,
+        "tolerance": tolerance,
+        "candidates": sorted(results, key=lambda r: r["size_kb"]),
+    }
+    return best_bundle, report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Search smaller, faster forests and export the smallest one within an accuracy tolerance')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Directory with the DATA/<gesture> samples')
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help='Where to write the chosen model bundle')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='Largest held-out accuracy drop accepted against the full forest')
+    parser.add_argument('--feature-sets', nargs='+', choices=sorted(FEATURE_WIDTHS), default=list(FEATURE_SETS),
+                        help='Feature sets the students are searched over')
+    parser.add_argument('--report', help='Write the full search report (JSON) here')
+    parser.add_argument('--dry-run', action='store_true', help='Only report, do not replace the bundle')
+    args = parser.parse_args()
+
+    bundle, report = distill(args.data_dir, tolerance=args.tolerance, feature_sets=args.feature_sets)
+    teacher, chosen = report["teacher"], report["chosen"]
+    print(f"\nFull forest: accuracy {teacher['accuracy']:.3f}, {teacher['latency_ms']:.3f} ms/row, "
+          f"{teacher['size_kb']:.1f} KB")
+    print(f"Chosen {chosen['feature_set']} {chosen['params']}: accuracy {chosen['accuracy']:.3f}, {chosen['latency_ms']:.3f} ms/row, "
+          f"{chosen['size_kb']:.1f} KB")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report: {args.report}")
+
+    if not args.dry_run:
+        os.makedirs(os.path.dirname(os.path.abspath(args.bundle)), exist_ok=True)
+        if os.path.exists(args.bundle):
+            # Keep the previous artifact for manual rollback
+            shutil.copy2(args.bundle, args.bundle + ".prev")
+        bundle.save(args.bundle)
+        print(f"Model Bundle: {args.bundle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+WRIST, MIDDLE_MCP = 0, 9
+FINGERTIPS = [4, 8, 12, 16, 20]
+
+# Landmark chains from the wrist to each fingertip, thumb first
+FINGER_CHAINS = np.array([
+    [0, 1, 2, 3, 4],
+    [0, 5, 6, 7, 8],
+    [0, 9, 10, 11, 12],
+    [0, 13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+])
+TIP_PAIRS = np.triu_indices(len(FINGERTIPS), 1)
+
+# "raw" is the original 63 normalized image coordinates. "invariant" drops the
+# dependence on where the hand is and how far it is from the camera (but not
+# its orientation, which the direction gestures need):
+#   60 wrist-relative coordinates divided by the wrist -> middle knuckle length
+#   15 joint bend cosines (3 per finger)
+#   10 distances between fingertips, in the same hand-size units
+FEATURE_WIDTHS = {"raw": NUM_LANDMARKS * 3, "invariant": 60 + 15 + 10}
+DEFAULT_FEATURE_SET = "raw"
+
+
+def feature_width(feature_set):
+    if feature_set not in FEATURE_WIDTHS:
+        raise ValueError(f"Unknown feature set: {feature_set}")
+    return FEATURE_WIDTHS[feature_set]
+
+
+def feature_name(index, feature_set=DEFAULT_FEATURE_SET):
+    """Readable name of one feature column, for importance reports"""
+    coord = "xyz"
+    if feature_set == "raw":
+        return f"Point {index // 3} {coord[index % 3]}"
+    if index < 60:
+        return f"Point {index // 3 + 1} {coord[index % 3]} (wrist-relative)"
+    if index < 75:
+        finger, joint = divmod(index - 60, 3)
+        return f"Finger {finger} joint {joint + 1} bend"
+    pair = index - 75
+    return f"Tip {FINGERTIPS[TIP_PAIRS[0][pair]]}-{FINGERTIPS[TIP_PAIRS[1][pair]]} distance"
+
+
+def landmark_scale(landmarks, feature_set=DEFAULT_FEATURE_SET, feature_columns=None):
+    """Per-coordinate spread of raw landmarks that non-raw or pruned bundles carry for the online head, or None"""
+    if feature_set == "raw" and feature_columns is None:
+        return None
+    flat = np.asarray(landmarks, dtype=np.float64).reshape(-1, NUM_LANDMARKS * 3)
+    std = flat.std(axis=0)
+    return np.where(std > 0, std, 1.0)
+
+
+def compute_features(landmarks, feature_set=DEFAULT_FEATURE_SET):
+    """(N, width) float32 feature rows for (N, 21, 3) landmarks, in one batched pass.
+
+    Used for bulk training matrices and for the one or two hands of a live
+    frame alike, so both sides always agree on the features.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+    if feature_set == "raw":
+        return landmarks.reshape(len(landmarks), -1)
+    feature_width(feature_set)
+
+    n_hands = len(landmarks)
+    relative = landmarks - landmarks[:, WRIST:WRIST + 1]
+    middle = relative[:, MIDDLE_MCP]
+    relative /= np.maximum(np.sqrt((middle * middle).sum(axis=-1)), 1e-6)[:, None, None]
+
+    # Cosine of the bend at every joint between two consecutive bones
+    chains = relative[:, FINGER_CHAINS]
+    bones = chains[:, :, 1:] - chains[:, :, :-1]
+    bones /= np.maximum(np.sqrt((bones * bones).sum(axis=-1, keepdims=True)), 1e-6)
+    bends = (bones[:, :, :-1] * bones[:, :, 1:]).sum(axis=-1)
+
+    tips = relative[:, FINGERTIPS]
+    tip_offsets = tips[:, TIP_PAIRS[0]] - tips[:, TIP_PAIRS[1]]
+    tip_distances = np.sqrt((tip_offsets * tip_offsets).sum(axis=-1))
+
+    return np.concatenate([
+        relative[:, 1:].reshape(n_hands, -1),
+        bends.reshape(n_hands, -1),
+        tip_distances,
+    ], axis=1)
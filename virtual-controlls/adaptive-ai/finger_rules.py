@@ -0,0 +1,93 @@
+import numpy as np
+
+# Landmark indices: (tip, joint the tip is compared against, anchor both are
+# measured from) per finger, thumb first
+FINGER_TIPS = [4, 8, 12, 16, 20]
+FINGER_JOINTS = [3, 6, 10, 14, 18]
+FINGER_ANCHORS = [17, 0, 0, 0, 0]  # Pinky knuckle for the thumb, wrist for the others
+INDEX_TIP, INDEX_MCP = 8, 5
+N_POSE_CODES = 1 << 7
+
+# Gathered in one take: tips, joints, anchors, then the index knuckle and tip
+POINTS = np.array(FINGER_TIPS + FINGER_JOINTS + FINGER_ANCHORS + [INDEX_MCP, INDEX_TIP])
+FINGER_BITS = 1 << np.arange(5)
+
+# A pose code resolves frames on its own only with this much training support and agreement
+MIN_SUPPORT = 20
+MIN_PURITY = 0.98
+
+
+def pose_codes(landmarks):
+    """7-bit pose code per hand for an (n_hands, 21, 3) landmark array.
+
+    Bits 0-4 are the finger-extension bitmask (thumb to pinky), the same
+    kind of cheap comparison the mouse controllers use, made orientation
+    independent: a finger is extended when its tip is farther from the wrist
+    than its middle joint (the thumb is measured from the pinky knuckle).
+    Bits 5-6 are the direction the index finger points in (0 right, 1 left,
+    2 down, 3 up, in image coordinates), which separates pointing gestures
+    that share a bitmask.
+    """
+    # float64 like pose_code, so batch and per-frame codes agree exactly
+    points = landmarks[:, POINTS, :2].astype(np.float64)
+    # (n, 2, 5, 2): tips and joints relative to their anchors
+    offsets = points[:, :10].reshape(-1, 2, 5, 2) - points[:, None, 10:15]
+    distance = np.einsum("nfki,nfki->nfk", offsets, offsets)
+    codes = (distance[:, 0] > distance[:, 1]) @ FINGER_BITS
+
+    pointing = points[:, 16] - points[:, 15]
+    vertical = np.abs(pointing[:, 1]) > np.abs(pointing[:, 0])
+    negative = np.where(vertical, pointing[:, 1], pointing[:, 0]) < 0
+    return codes | ((vertical * 2 + negative) << 5)
+
+
+def pose_code(hand):
+    """pose_codes for a single (21, 3) hand, in plain Python.
+
+    With one or two hands per frame NumPy's per-call overhead dominates, so
+    the live path uses this scalar version (a few microseconds) and the
+    vectorized one is kept for training batches.
+    """
+    points = hand.tolist()
+    code = 0
+    for bit, (tip, joint, anchor) in enumerate(zip(FINGER_TIPS, FINGER_JOINTS, FINGER_ANCHORS)):
+        ax, ay = points[anchor][0], points[anchor][1]
+        tx, ty = points[tip][0] - ax, points[tip][1] - ay
+        jx, jy = points[joint][0] - ax, points[joint][1] - ay
+        if tx * tx + ty * ty > jx * jx + jy * jy:
+            code |= 1 << bit
+
+    px = points[INDEX_TIP][0] - points[INDEX_MCP][0]
+    py = points[INDEX_TIP][1] - points[INDEX_MCP][1]
+    if abs(py) > abs(px):
+        return code | ((2 + (py < 0)) << 5)
+    return code | ((px < 0) << 5)
+
+
+def learn_rule_table(landmarks, labels, n_classes, min_support=MIN_SUPPORT, min_purity=MIN_PURITY):
+    """(N_POSE_CODES, n_classes) probabilities for pose codes that decide the class on their own.
+
+    `landmarks` are (N, 21, 3) training samples and `labels` their class
+    indices. A code gets its observed class distribution when at least
+    `min_support` samples have it and at least `min_purity` of them share
+    one class; every other row is zero, which sends the frame on to the
+    forest.
+    """
+    codes = pose_codes(np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3))
+    counts = np.zeros((N_POSE_CODES, n_classes), dtype=np.int64)
+    np.add.at(counts, (codes, np.asarray(labels)), 1)
+
+    support = counts.sum(axis=1)
+    best = counts.argmax(axis=1)
+    purity = counts[np.arange(N_POSE_CODES), best] / np.maximum(support, 1)
+    decisive = (support >= min_support) & (purity >= min_purity)
+
+    table = np.zeros((N_POSE_CODES, n_classes), dtype=np.float64)
+    table[decisive] = counts[decisive] / support[decisive, None]
+    return table
+
+
+def rule_table_summary(table, classes):
+    """Human-readable list of the pose codes the table resolves"""
+    resolved = np.flatnonzero(table.any(axis=1))
+    return ", ".join(f"{code:07b}->{classes[int(table[code].argmax())]}" for code in resolved) or "none"
@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class CompiledForest:
+    """RandomForest flattened into contiguous node arrays for fast small-batch inference.
+
+    All trees are stored back to back in one set of arrays and evaluated
+    together: every step advances one node per (row, tree) pair with a handful
+    of vectorized NumPy operations, so a single-row prediction costs about
+    `max_depth` array operations instead of a Python loop over estimators.
+
+    Leaves point to themselves, which lets every walk run for exactly
+    `max_depth` steps without masking finished trees.
+    """
+
+    def __init__(self, feature, threshold, children, values, roots, max_depth, classes=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.children = np.ascontiguousarray(children, dtype=np.intp)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.classes = classes
+        self.n_trees = len(self.roots)
+        self.n_classes = self.values.shape[1]
+        self._workspaces = {}
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted sklearn RandomForestClassifier"""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            # Leaves loop back to themselves and always compare feature 0 against +inf
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature)
+
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, np.inf, _float32_floor(tree.threshold)))
+            children.append(np.stack([left, right], axis=1))
+
+            # Leaf class distributions, normalized the same way predict_proba does
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children).reshape(-1),
+            values=np.concatenate(values),
+            roots=np.array(roots),
+            max_depth=max_depth,
+            classes=getattr(forest, "classes_", None),
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _workspace(self, n_rows, n_features):
+        workspace = self._workspaces.get((n_rows, n_features))
+        if workspace is None:
+            shape = (n_rows, self.n_trees)
+            workspace = {
+                "node": np.empty(shape, dtype=np.intp),
+                "feature": np.empty(shape, dtype=np.intp),
+                "x": np.empty(shape, dtype=np.float32),
+                "threshold": np.empty(shape, dtype=np.float32),
+                "branch": np.empty(shape, dtype=np.intp),
+                "leaf_values": np.empty(shape + (self.n_classes,), dtype=np.float64),
+                "row_offsets": (np.arange(n_rows, dtype=np.intp) * n_features)[:, None],
+                "proba": np.empty((n_rows, self.n_classes), dtype=np.float64),
+            }
+            self._workspaces[(n_rows, n_features)] = workspace
+        return workspace
+
+    def apply(self, X):
+        """Return the leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        ws = self._workspace(*X.shape)
+        node, feature, x, threshold, branch, row_offsets = (
+            ws["node"], ws["feature"], ws["x"], ws["threshold"], ws["branch"], ws["row_offsets"])
+        flat_x = X.reshape(-1)
+
+        node[...] = self.roots
+        for _ in range(self.max_depth):
+            np.take(self.feature, node, out=feature)
+            np.add(feature, row_offsets, out=feature)
+            np.take(flat_x, feature, out=x)
+            np.take(self.threshold, node, out=threshold)
+            # branch = 2 * node + (x > threshold) indexes the flattened (left, right) pairs
+            np.greater(x, threshold, out=branch)
+            np.add(branch, node, out=branch)
+            np.add(branch, node, out=branch)
+            np.take(self.children, branch, out=node)
+        return node
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over all trees, shape (n_rows, n_classes).
+
+        The returned array is a reusable buffer owned by the engine; copy it if
+        it has to outlive the next call with the same number of rows.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        node = self.apply(X)
+        ws = self._workspace(*X.shape)
+        np.take(self.values, node, axis=0, out=ws["leaf_values"])
+        proba = ws["proba"]
+        ws["leaf_values"].sum(axis=1, out=proba)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        indices = np.argmax(self.predict_proba(X), axis=1)
+        if self.classes is not None:
+            return np.asarray(self.classes)[indices]
+        return indices
+
+
+def _float32_floor(threshold):
+    """Largest float32 <= each float64 threshold.
+
+    sklearn compares float32 inputs against float64 thresholds; rounding the
+    thresholds down keeps `x <= threshold` exactly equivalent in float32.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+from collections import deque, namedtuple
+from threading import Thread, Condition, Event
+
+# Keys sent for each gesture; one key is a press, several are a hotkey
+GESTURE_KEYS = {
+    "up": ("up",),
+    "down": ("down",),
+    "left": ("left",),
+    "right": ("right",),
+    "undo": ("ctrl", "z"),
+    "redo": ("ctrl", "y"),
+    "stop": ("q",),  # Press 'q' to quit the application
+}
+
+# Browser key names (as captured by the dashboard's key mapping dialog) that
+# differ from pyautogui's; anything else is just lowercased
+KEY_ALIASES = {
+    "CONTROL": "ctrl",
+    "ARROWUP": "up",
+    "ARROWDOWN": "down",
+    "ARROWLEFT": "left",
+    "ARROWRIGHT": "right",
+    "ESCAPE": "esc",
+    " ": "space",
+    "META": "win",
+    "OS": "win",
+}
+
+# How a held gesture turns into key presses:
+#   repeat_interval - None fires once per hold (edge-triggered), otherwise the
+#                     keys repeat at this interval while the gesture is held
+#   repeat_delay    - wait before the first repeat (like a keyboard's autorepeat)
+#   cooldown        - minimum time between two firings of the gesture
+#   release_after   - how long the gesture must be gone before a new hold starts,
+#                     so a frame or two of misclassification is not a release
+GesturePolicy = namedtuple(
+    "GesturePolicy", "repeat_interval repeat_delay cooldown release_after",
+    defaults=(None, 0.4, 0.0, 0.3)
+)
+
+# Gesture cooldown settings
+UNDO_REDO_COOLDOWN = 1.0  # 1 second cooldown for undo/redo
+ARROW_POLICY = GesturePolicy(repeat_interval=0.2)  # Held arrows scroll steadily
+EDGE_POLICY = GesturePolicy()
+GESTURE_POLICIES = {
+    "up": ARROW_POLICY,
+    "down": ARROW_POLICY,
+    "left": ARROW_POLICY,
+    "right": ARROW_POLICY,
+    "undo": GesturePolicy(cooldown=UNDO_REDO_COOLDOWN),
+    "redo": GesturePolicy(cooldown=UNDO_REDO_COOLDOWN),
+    "stop": EDGE_POLICY,
+}
+
+
+class ActionChooser:
+    """Decides which keys a recognized gesture sends, without sending them.
+
+    Called with the confident gesture of every frame; the gesture's policy
+    turns the stream into presses (once per hold, or autorepeat). Holds,
+    repeats and cooldowns are tracked per `hand` (handedness label), so two
+    hands never cancel or retrigger each other. Keeps its state against an
+    injectable clock, so the same decisions can be replayed
+    offline with a deterministic one.
+    """
+
+    def __init__(self, gesture_keys=GESTURE_KEYS, policies=GESTURE_POLICIES,
+                 default_policy=EDGE_POLICY, clock=time.time):
+        self.gesture_keys = gesture_keys
+        self.policies = policies
+        self.default_policy = default_policy
+        self.clock = clock
+        self.last_seen = {}  # (hand, gesture) -> time of its latest frame
+        self.last_fired = {}  # (hand, gesture) -> time it last sent keys
+        self.next_repeat = {}  # (hand, gesture) -> earliest autorepeat while held, absent until the first press
+
+    def choose(self, gesture, hand=None):
+        """Keys to send for `gesture` shown by `hand` now, or None"""
+        keys = self.gesture_keys.get(gesture)
+        if keys is None:
+            return None
+        policy = self.policies.get(gesture, self.default_policy)
+        now = self.clock()
+        state = (hand, gesture)
+
+        # A new hold starts when the gesture was gone for longer than release_after
+        if now - self.last_seen.get(state, float("-inf")) > policy.release_after:
+            self.next_repeat.pop(state, None)
+        self.last_seen[state] = now
+
+        next_repeat = self.next_repeat.get(state)
+        if next_repeat is not None:
+            # Already fired during this hold: only autorepeat may fire again
+            if policy.repeat_interval is None or now < next_repeat:
+                return None
+        if now - self.last_fired.get(state, float("-inf")) < policy.cooldown:
+            return None
+
+        self.last_fired[state] = now
+        if policy.repeat_interval is not None:
+            delay = policy.repeat_interval if next_repeat is not None else policy.repeat_delay
+            self.next_repeat[state] = now + delay
+        else:
+            self.next_repeat[state] = float("inf")
+        return keys
+
+
+def parse_key_combo(text):
+    """'CTRL+Z' / 'ARROWUP' / 'CTRL++' -> pyautogui key names, or None if empty"""
+    text = str(text) if text is not None else ""
+    if text == "+":
+        parts = ["+"]
+    elif text.endswith("++"):
+        parts = text[:-2].split("+") + ["+"]
+    else:
+        parts = text.split("+")
+    # The space bar arrives as " ", so only surrounding whitespace of longer names is dropped
+    parts = [part if part == " " else part.strip() for part in parts]
+    keys = tuple(KEY_ALIASES.get(part.upper(), part.lower()) for part in parts if part)
+    return keys or None
+
+
+def compile_dispatch_table(key_mappings=None, custom_gestures=None, defaults=GESTURE_KEYS):
+    """Gesture -> key tuple from the built-in keys, custom_gestures.json and key_mappings.json.
+
+    Later sources win: a custom gesture's own "key" overrides the default,
+    and a mapping saved from the dashboard overrides both.
+    """
+    table = dict(defaults)
+    for gesture, details in (custom_gestures or {}).items():
+        keys = parse_key_combo(details.get("key")) if isinstance(details, dict) else None
+        if keys is not None:
+            table[gesture] = keys
+    for gesture, mapping in (key_mappings or {}).items():
+        keys = parse_key_combo(mapping)
+        if keys is not None:
+            table[gesture] = keys
+    return table
+
+
+class KeyMappingWatcher(Thread):
+    """Keeps an ActionChooser's dispatch table in sync with the mapping files.
+
+    Polls the files' mtime and size every `interval` seconds on its own
+    thread; on a change both files are re-read, compiled and installed with
+    a single reference swap, so the frame path never touches the disk and
+    never sees a half-built table. Unreadable or half-written files keep
+    the current table and are retried on the next poll.
+    """
+
+    def __init__(self, chooser, mappings_path, gestures_path, interval=1.0):
+        super().__init__(daemon=True)
+        self.chooser = chooser
+        self.paths = (mappings_path, gestures_path)
+        self.interval = interval
+        self.signature = None
+        self.failed_signature = None
+        self.stop_event = Event()
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def reload(self):
+        """Install a fresh table if the files changed; returns whether it did"""
+        signature = self._signature()
+        if signature == self.signature:
+            return False
+        try:
+            key_mappings, custom_gestures = (
+                self._read(path) if stamp is not None else {} for path, stamp in zip(self.paths, signature)
+            )
+        except (json.JSONDecodeError, OSError) as e:
+            if signature != self.failed_signature:
+                print(f"⚠️ Keeping current key mappings, could not read them: {str(e)}")
+                self.failed_signature = signature
+            return False
+        self.chooser.gesture_keys = compile_dispatch_table(key_mappings, custom_gestures)
+        changed = self.signature is not None
+        self.signature = signature
+        if changed:
+            print("⌨️ Key mappings reloaded")
+        return True
+
+    @staticmethod
+    def _read(path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.reload()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class ActionExecutor(Thread):
+    """Sends key actions from its own thread so recognition never waits on OS input.
+
+    `submit` only queues; `send(keys)` (e.g. pyautogui) runs here. A key
+    combination identical to one still waiting is coalesced into it, and
+    past `maxsize` pending actions the oldest is dropped. With `stats` (a
+    PipelineStats), the time actions wait and take to send is recorded.
+    """
+
+    def __init__(self, send, maxsize=4, stats=None):
+        super().__init__(daemon=True)
+        self.send = send
+        self.maxsize = maxsize
+        self.stats = stats
+        self.pending = deque()
+        self.cond = Condition()
+        self.closed = False
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def submit(self, keys):
+        with self.cond:
+            if any(pending_keys == keys for pending_keys, _ in self.pending):
+                self.coalesced += 1
+                return
+            if len(self.pending) >= self.maxsize:
+                self.pending.popleft()
+                self.dropped += 1
+            self.pending.append((keys, time.perf_counter()))
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                keys, submitted_at = self.pending.popleft()
+            started = time.perf_counter()
+            try:
+                self.send(keys)
+            except Exception as e:
+                print(f"Error performing gesture action: {str(e)}")
+            self.sent += 1
+            if self.stats is not None:
+                self.stats.record("action_queue", started - submitted_at)
+                self.stats.record("pyautogui", time.perf_counter() - started)
+                self.stats.set_counter("actions_coalesced", self.coalesced)
+                self.stats.set_counter("actions_dropped", self.dropped)
+
+    def close(self, timeout=1.0):
+        """Send what is still queued, then stop"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,156 @@
+import cv2
+import numpy as np
+
+# MediaPipe hand skeleton (same pairs as mp.solutions.hands.HAND_CONNECTIONS)
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+], dtype=np.intp)
+
+CONNECTION_COLOR = (224, 224, 224)
+LANDMARK_COLOR = (0, 0, 255)
+
+
+class SkeletonDrawer:
+    """Draws hand landmarks with two OpenCV calls instead of one per joint and bone.
+
+    Pixel coordinates for all 21 landmarks are computed in one NumPy pass;
+    bones go out as a single polylines call and joints as zero-length thick
+    segments (which OpenCV renders as filled dots) in a second one.
+    """
+
+    def __init__(self, connection_thickness=2, joint_radius=3):
+        self.connection_thickness = connection_thickness
+        self.joint_thickness = joint_radius * 2
+        self.normalized = np.zeros((21, 2), dtype=np.float32)
+        self.pixels = np.zeros((21, 2), dtype=np.int32)
+        self.size = np.zeros(2, dtype=np.float32)
+        self.bones = np.zeros((len(HAND_CONNECTIONS), 2, 2), dtype=np.int32)
+        self.joints = np.zeros((21, 2, 2), dtype=np.int32)
+
+    def draw(self, frame, landmarks):
+        """Draw one hand from MediaPipe landmarks (anything with .x and .y) onto a BGR frame"""
+        for i, lm in enumerate(landmarks):
+            point = self.normalized[i]
+            point[0] = lm.x
+            point[1] = lm.y
+        self.size[0] = frame.shape[1]
+        self.size[1] = frame.shape[0]
+        np.multiply(self.normalized, self.size, out=self.normalized)
+        np.copyto(self.pixels, self.normalized, casting="unsafe")
+
+        np.take(self.pixels, HAND_CONNECTIONS, axis=0, out=self.bones)
+        cv2.polylines(frame, self.bones, False, CONNECTION_COLOR, self.connection_thickness)
+        self.joints[:, 0] = self.pixels
+        self.joints[:, 1] = self.pixels
+        cv2.polylines(frame, self.joints, False, LANDMARK_COLOR, self.joint_thickness)
+        return frame
+
+
+class HudLayer:
+    """A block of overlay graphics rendered once and composited until its content changes.
+
+    `render(image, mask)` draws into a black patch and a single-channel mask;
+    the result is cached under `key`, and every frame only the masked pixels
+    are copied onto the video frame.
+    """
+
+    def __init__(self, origin, size):
+        self.origin = origin
+        self.height, self.width = size
+        self.image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        self.key = None
+        self.redraws = 0
+
+    def update(self, key, render):
+        if key == self.key:
+            return
+        self.image[...] = 0
+        self.mask[...] = 0
+        render(self.image, self.mask)
+        self.key = key
+        self.redraws += 1
+
+    def composite(self, frame):
+        x, y = self.origin
+        h = min(self.height, frame.shape[0] - y)
+        w = min(self.width, frame.shape[1] - x)
+        if h <= 0 or w <= 0:
+            return frame
+        cv2.copyTo(self.image[:h, :w], self.mask[:h, :w], frame[y:y+h, x:x+w])
+        return frame
+
+
+def put_text(image, mask, text, org, scale, color, thickness):
+    cv2.putText(image, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    cv2.putText(mask, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness)
+
+
+def fill_rect(image, mask, top_left, bottom_right, color):
+    cv2.rectangle(image, top_left, bottom_right, color, -1)
+    cv2.rectangle(mask, top_left, bottom_right, 255, -1)
+
+
+class GestureHud:
+    """Prediction line, learning progress bar and status text for predict_live.
+
+    Each line is its own cached layer, so a frame only re-renders the parts
+    whose displayed values actually changed. The frequency count rises on
+    almost every confident frame, so the progress line shows it rounded down
+    to `progress_step` (1% of the threshold by default) and is re-rendered
+    only when that rounded value moves. `top` stacks one HUD per hand.
+    """
+
+    HEIGHT = 130
+
+    def __init__(self, frequency_threshold, bar_width=300, bar_height=30, top=0, progress_step=None):
+        self.frequency_threshold = frequency_threshold
+        self.progress_step = progress_step or max(1, frequency_threshold // 100)
+        self.bar_width = bar_width
+        self.bar_height = bar_height
+        self.prediction_layer = HudLayer((0, top), (40, 400))
+        self.progress_layer = HudLayer((0, top + 40), (70, 640))
+        self.status_layer = HudLayer((0, top + 100), (30, 400))
+
+    def draw(self, frame, prediction, confidence, progress, approved):
+        prediction_text = f"{prediction} ({confidence:.0%})"
+        self.prediction_layer.update(prediction_text, lambda image, mask: put_text(
+            image, mask, prediction_text, (10, 30), 1, (0, 255, 0), 2))
+
+        if progress >= self.frequency_threshold:
+            shown = self.frequency_threshold
+        else:
+            shown = progress - progress % self.progress_step
+        if shown != self.progress_layer.key:
+            progress_percent = shown / self.frequency_threshold * 100
+            filled_width = int(self.bar_width * progress_percent / 100)
+            progress_text = f"Learning Progress: {shown}/{self.frequency_threshold} ({progress_percent:.0f}%)"
+            self.progress_layer.update(shown, lambda image, mask: self._draw_progress(
+                image, mask, progress_text, shown, filled_width))
+
+        status = "APPROVED ✓" if approved else "Learning..."
+        status_color = (0, 255, 0) if approved else (0, 165, 255)
+        self.status_layer.update(status, lambda image, mask: self._draw_status(
+            image, mask, f"Status: {status}", status_color))
+
+        for layer in (self.prediction_layer, self.progress_layer, self.status_layer):
+            layer.composite(frame)
+        return frame
+
+    def _draw_progress(self, image, mask, progress_text, progress, filled_width):
+        # Layer coordinates are offset by the layer origin (y = 40)
+        bar_x, bar_y = 10, 30
+        fill_rect(image, mask, (bar_x, bar_y), (bar_x + self.bar_width, bar_y + self.bar_height), (50, 50, 50))
+        if filled_width > 0:
+            fill_rect(image, mask, (bar_x, bar_y), (bar_x + filled_width, bar_y + self.bar_height),
+                      (0, 255, 0) if progress >= self.frequency_threshold else (0, 165, 255))
+        put_text(image, mask, progress_text, (10, 20), 0.7, (255, 255, 255), 3)  # White outline
+        put_text(image, mask, progress_text, (10, 20), 0.7, (0, 0, 0), 1)  # Black text
+
+    def _draw_status(self, image, mask, text, color):
+        put_text(image, mask, text, (10, 20), 0.7, (255, 255, 255), 3)  # White outline
+        put_text(image, mask, text, (10, 20), 0.7, color, 1)  # Colored text
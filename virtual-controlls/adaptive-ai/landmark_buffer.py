@@ -0,0 +1,67 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+class LandmarkBuffer:
+    """Reusable float32 storage for per-hand landmarks and their scaled features.
+
+    `raw` has shape (max_hands, 21, 3) and is filled directly from MediaPipe's
+    landmark protobufs; `scaled` holds the (max_hands, 63) rows standardized
+    with the active model's scaler, which the classifier consumes. Both are
+    allocated once, so the per-frame path only writes into existing memory
+    and hands out precomputed views.
+    """
+
+    def __init__(self, max_hands):
+        self.max_hands = max_hands
+        self.raw = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.scaled = np.zeros((max_hands, NUM_LANDMARKS * 3), dtype=np.float32)
+
+        # Views handed to callers; creating them once keeps fill/scale allocation free
+        self._flat_raw = self.raw.reshape(max_hands, NUM_LANDMARKS * 3)
+        self._flat_prefixes = [self._flat_raw[:n] for n in range(max_hands + 1)]
+        self._flat_rows = [self._flat_raw[i] for i in range(max_hands)]
+        self._raw_rows = [self.raw[i] for i in range(max_hands)]
+        self._scaled_prefixes = [self.scaled[:n] for n in range(max_hands + 1)]
+        self._allocate_selected(0)
+
+    def _allocate_selected(self, width):
+        self.selected = np.zeros((self.max_hands, width), dtype=np.float32)
+        self._selected_prefixes = [self.selected[:n] for n in range(self.max_hands + 1)]
+
+    def fill(self, hand_index, landmarks):
+        """Copy one hand's 21 landmarks (x, y, z) into slot `hand_index`"""
+        row = self._raw_rows[hand_index]
+        for i, lm in enumerate(landmarks):
+            point = row[i]
+            point[0] = lm.x
+            point[1] = lm.y
+            point[2] = lm.z
+        return row
+
+    def scale_hands(self, n_hands, mean, scale):
+        """Standardize the first `n_hands` slots and return them as an (n_hands, 63) view"""
+        out = self._scaled_prefixes[n_hands]
+        np.subtract(self._flat_prefixes[n_hands], mean, out=out)
+        np.divide(out, scale, out=out)
+        return out
+
+    def scale_columns(self, n_hands, columns, mean, scale):
+        """Gather `columns` of the first `n_hands` slots, standardize them and return an (n_hands, k) view"""
+        if self.selected.shape[1] != len(columns):
+            # Only reallocated when a model with a different column count is installed
+            self._allocate_selected(len(columns))
+        out = self._selected_prefixes[n_hands]
+        np.take(self._flat_prefixes[n_hands], columns, axis=1, out=out)
+        np.subtract(out, mean, out=out)
+        np.divide(out, scale, out=out)
+        return out
+
+    def flat(self, hand_index):
+        """(63,) view of the raw landmarks in slot `hand_index`"""
+        return self._flat_rows[hand_index]
+
+    def hand(self, hand_index):
+        """(21, 3) view of the raw landmarks in slot `hand_index`"""
+        return self._raw_rows[hand_index]
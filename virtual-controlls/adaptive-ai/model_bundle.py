@@ -0,0 +1,279 @@
+import os
+import json
+import struct
+import hashlib
+import argparse
+from datetime import datetime
+import numpy as np
+
+from forest_engine import CompiledForest
+from finger_rules import pose_codes, rule_table_summary
+from features import DEFAULT_FEATURE_SET, compute_features, feature_width
+
+# File layout: magic, format version, header length, JSON header, then the
+# raw array payload. Every array starts on an ALIGNMENT boundary so it can be
+# viewed straight out of a read-only memory map without copying.
+MAGIC = b"GSTBNDL\0"
+# Version 2 added the feature_set header field and version 3 the feature_columns
+# array, which older readers must not ignore
+FORMAT_VERSION = 3
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+# Written next to the legacy joblib pickles: the feature set, columns and
+# landmark scale their scaler and forest expect (absent means full "raw")
+PICKLE_FEATURES_NAME = "features.json"
+
+FOREST_ARRAYS = ("feature", "threshold", "children", "values", "roots")
+
+
+class BundleError(Exception):
+    pass
+
+
+class ModelBundle:
+    """Everything predict_live needs to classify a frame, in one artifact.
+
+    Holds the compiled forest, the StandardScaler mean/scale, the class names,
+    free-form training metadata and, optionally, the finger-rule table that
+    resolves unambiguous poses before the forest (see finger_rules.py).
+    `feature_set` names the features.py set the forest was trained on
+    (bundles from before it existed are "raw"). `landmark_scale` is the per-coordinate
+    spread of the raw landmarks, which the online head standardizes with;
+    for "raw" bundles it is the scaler's scale. `feature_columns`, when set,
+    are the indices of the feature set's columns the forest was trained on
+    (importance pruning in train_gesture_model.py); the scaler covers only
+    those columns.
+    """
+
+    def __init__(self, forest, scaler_mean, scaler_scale, classes, metadata=None, rule_table=None,
+                 feature_set=DEFAULT_FEATURE_SET, landmark_scale=None, feature_columns=None):
+        self.forest = forest
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.classes = list(classes)
+        self.metadata = dict(metadata or {})
+        self.feature_set = feature_set
+        self.feature_columns = feature_columns
+        if landmark_scale is None and (self.feature_set != "raw" or feature_columns is not None):
+            raise BundleError(f"A pruned or '{self.feature_set}' bundle needs the raw landmark scale")
+        self.stored_landmark_scale = landmark_scale
+        self.landmark_scale = landmark_scale if landmark_scale is not None else scaler_scale
+        self.rule_table = rule_table
+        # Plain list for the per-frame check of whether a pose code is decisive
+        self.rule_decisive = rule_table.any(axis=1).tolist() if rule_table is not None else None
+
+    @classmethod
+    def from_sklearn(cls, clf, scaler, classes, metadata=None, rule_table=None,
+                     feature_set=DEFAULT_FEATURE_SET, landmark_scale=None, feature_columns=None):
+        """Build a bundle from a fitted RandomForestClassifier and StandardScaler"""
+        return cls(
+            forest=CompiledForest.from_sklearn(clf),
+            scaler_mean=np.asarray(scaler.mean_, dtype=np.float32),
+            scaler_scale=np.asarray(scaler.scale_, dtype=np.float32),
+            classes=[str(c) for c in classes],
+            metadata=metadata,
+            rule_table=rule_table,
+            feature_set=feature_set,
+            landmark_scale=None if landmark_scale is None else np.asarray(landmark_scale, dtype=np.float32),
+            feature_columns=None if feature_columns is None else np.array(feature_columns, dtype=np.intp),
+        )
+
+    def arrays(self):
+        arrays = {f"forest_{name}": getattr(self.forest, name) for name in FOREST_ARRAYS}
+        arrays["scaler_mean"] = self.scaler_mean
+        arrays["scaler_scale"] = self.scaler_scale
+        if self.rule_table is not None:
+            arrays["rule_table"] = self.rule_table
+        if self.stored_landmark_scale is not None:
+            arrays["landmark_scale"] = self.stored_landmark_scale
+        if self.feature_columns is not None:
+            arrays["feature_columns"] = self.feature_columns
+        return arrays
+
+    def featurize(self, landmarks):
+        """Scaled forest input rows for raw (N, 63) landmark rows"""
+        features = compute_features(landmarks, self.feature_set)
+        if self.feature_columns is not None:
+            features = features[:, self.feature_columns]
+        return (features - self.scaler_mean) / self.scaler_scale
+
+    def predict_proba(self, landmarks):
+        """Class probabilities for raw (N, 63) landmark rows, rule stage first like predict_live"""
+        X = np.asarray(landmarks, dtype=np.float32).reshape(len(landmarks), -1)
+        proba = self.forest.predict_proba(self.featurize(X)).copy()
+        if self.rule_table is not None:
+            rule_proba = self.rule_table[pose_codes(X.reshape(-1, 21, 3))]
+            resolved = rule_proba.any(axis=1)
+            proba[resolved] = rule_proba[resolved]
+        return proba
+
+    def save(self, path):
+        """Write the bundle atomically (temp file + rename)"""
+        layout = {}
+        chunks = []
+        offset = 0
+        for name, array in self.arrays().items():
+            array = np.ascontiguousarray(array)
+            padding = -offset % ALIGNMENT
+            chunks.append(b"\0" * padding)
+            offset += padding
+            layout[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            chunks.append(array.tobytes())
+            offset += array.nbytes
+        payload = b"".join(chunks)
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "classes": self.classes,
+            "max_depth": self.forest.max_depth,
+            "feature_set": self.feature_set,
+            "arrays": layout,
+            "metadata": self.metadata,
+            "checksum": {"algorithm": "sha256", "digest": hashlib.sha256(payload).hexdigest()},
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_bytes += b" " * (-(PREAMBLE.size + len(header_bytes)) % ALIGNMENT)
+
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+
+def read_header(path):
+    """Parse only the JSON header of a bundle file"""
+    with open(path, "rb") as f:
+        magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not a gesture model bundle")
+        if version > FORMAT_VERSION:
+            raise BundleError(f"{path} uses bundle format {version}, newer than supported {FORMAT_VERSION}")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    return header, PREAMBLE.size + header_len
+
+
+def load_bundle(path, verify=True):
+    """Memory-map a bundle file; the arrays are read-only views of the page cache.
+
+    Several processes loading the same file share one physical copy, and
+    nothing is unpickled, so loading takes milliseconds.
+    """
+    header, payload_start = read_header(path)
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+    if verify:
+        digest = hashlib.sha256(mm[payload_start:]).hexdigest()
+        if digest != header["checksum"]["digest"]:
+            raise BundleError(f"Checksum mismatch in {path}")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        arrays[name] = np.ndarray(
+            shape=tuple(spec["shape"]),
+            dtype=np.dtype(spec["dtype"]),
+            buffer=mm,
+            offset=payload_start + spec["offset"],
+        )
+
+    forest = CompiledForest(
+        max_depth=header["max_depth"],
+        classes=header["classes"],
+        **{name: arrays[f"forest_{name}"] for name in FOREST_ARRAYS},
+    )
+    return ModelBundle(
+        forest=forest,
+        scaler_mean=arrays["scaler_mean"],
+        scaler_scale=arrays["scaler_scale"],
+        classes=header["classes"],
+        metadata=header["metadata"],
+        rule_table=arrays.get("rule_table"),
+        feature_set=header.get("feature_set", DEFAULT_FEATURE_SET),
+        landmark_scale=arrays.get("landmark_scale"),
+        feature_columns=arrays.get("feature_columns"),
+    )
+
+
+def save_pickle_features(models_dir, feature_set, feature_columns=None, landmark_scale=None):
+    """Record what the joblib pickles in models_dir were trained on"""
+    with open(os.path.join(models_dir, PICKLE_FEATURES_NAME), "w") as f:
+        json.dump({
+            "feature_set": feature_set,
+            "feature_columns": None if feature_columns is None else [int(c) for c in feature_columns],
+            "landmark_scale": None if landmark_scale is None else [float(s) for s in landmark_scale],
+        }, f)
+
+
+def load_pickle_features(models_dir, scaler):
+    """(feature_set, feature_columns, landmark_scale) of the joblib pickles in models_dir.
+
+    Raises BundleError if the scaler does not take the recorded features,
+    e.g. when the pickles and features.json come from different runs.
+    """
+    path = os.path.join(models_dir, PICKLE_FEATURES_NAME)
+    info = {}
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                info = json.load(f)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Could not read {path}: {e}") from e
+    feature_set = info.get("feature_set", DEFAULT_FEATURE_SET)
+    feature_columns = info.get("feature_columns")
+    width = len(feature_columns) if feature_columns is not None else feature_width(feature_set)
+    if scaler.n_features_in_ != width:
+        raise BundleError(f"The pickles in {models_dir} take {scaler.n_features_in_} features, but "
+                          f"{PICKLE_FEATURES_NAME} describes {width} ({feature_set}); retrain the model")
+    return feature_set, feature_columns, info.get("landmark_scale")
+
+
+def bundle_from_pickles(models_dir):
+    """Convert the legacy joblib model, scaler and label encoder into a bundle"""
+    import joblib
+
+    clf = joblib.load(os.path.join(models_dir, "gesture_model.pkl"))
+    scaler = joblib.load(os.path.join(models_dir, "scaler.pkl"))
+    le = joblib.load(os.path.join(models_dir, "label_encoder.pkl"))
+    feature_set, feature_columns, landmark_scale = load_pickle_features(models_dir, scaler)
+    metadata = {
+        "source": "converted from joblib pickles",
+        "converted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "n_estimators": len(clf.estimators_),
+    }
+    return ModelBundle.from_sklearn(clf, scaler, le.classes_, metadata, feature_set=feature_set,
+                                    landmark_scale=landmark_scale, feature_columns=feature_columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or create gesture model bundles')
+    parser.add_argument('bundle', help='Path of the bundle file')
+    parser.add_argument('--from-pickles', metavar='MODELS_DIR',
+                        help='Create the bundle from gesture_model.pkl, scaler.pkl and label_encoder.pkl')
+    args = parser.parse_args()
+
+    if args.from_pickles:
+        bundle_from_pickles(args.from_pickles).save(args.bundle)
+        print(f"Wrote {args.bundle}")
+
+    bundle = load_bundle(args.bundle)
+    print(f"Bundle: {args.bundle} ({os.path.getsize(args.bundle) / 1024:.1f} KB)")
+    print(f"Classes: {', '.join(bundle.classes)}")
+    print(f"Features: {bundle.feature_set} ({len(bundle.scaler_mean)} of {feature_width(bundle.feature_set)} per hand)")
+    print(f"Forest: {bundle.forest.n_trees} trees, {bundle.forest.n_nodes} nodes, max depth {bundle.forest.max_depth}")
+    if bundle.rule_table is not None:
+        print(f"Finger rules: {rule_table_summary(bundle.rule_table, bundle.classes)}")
+    for key, value in bundle.metadata.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import numpy as np
+
+
+class CentroidHead:
+    """Per-user class centroids layered on top of the base forest.
+
+    Every confirmed stable frame moves its class centroid towards the user's
+    landmarks with a running mean over the last `memory` samples, which costs
+    a few vector operations (microseconds) and never needs a batch retrain.
+
+    Centroids live in raw landmark space and distances are standardized with
+    the active model's scaler at prediction time, so they stay valid when the
+    base model is hot-swapped. At prediction time the head only redistributes
+    the forest's probability mass among classes it has enough samples for,
+    leaving every other class untouched.
+    """
+
+    def __init__(self, n_features=63, max_classes=32, memory=200, min_samples=10,
+                 max_weight=0.5, half_weight_samples=50):
+        self.memory = memory
+        self.min_samples = min_samples
+        self.max_weight = max_weight
+        self.half_weight_samples = half_weight_samples
+
+        self.names = []
+        self.centroids = np.zeros((max_classes, n_features), dtype=np.float64)
+        self.spread = np.ones(max_classes, dtype=np.float64)
+        self.counts = np.zeros(max_classes, dtype=np.int64)
+        self.delta = np.zeros(n_features, dtype=np.float64)
+        self.bound_rows = np.zeros(0, dtype=np.intp)
+
+    def _row(self, name):
+        if name in self.names:
+            return self.names.index(name)
+        if len(self.names) == len(self.counts):
+            raise ValueError(f"CentroidHead is full ({len(self.counts)} classes)")
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def bind(self, classes):
+        """Map the model's output columns to centroid rows (call when the model changes)"""
+        for name in classes:
+            self._row(name)
+        self.bound_rows = np.array([self.names.index(name) for name in classes], dtype=np.intp)
+
+    def update(self, name, landmarks, scale):
+        """Fold one confirmed (63,) raw landmark row into the centroid of `name`"""
+        row = self._row(name)
+        n = min(self.counts[row] + 1, self.memory)
+        centroid = self.centroids[row]
+        np.subtract(landmarks, centroid, out=self.delta)
+        centroid += self.delta / n
+
+        # Running mean of the standardized squared distance, used as the class spread
+        self.delta /= scale
+        distance = float(np.dot(self.delta, self.delta)) / len(self.delta)
+        if self.counts[row] == 0:
+            self.spread[row] = 1.0
+        else:
+            self.spread[row] += (max(distance, 1e-6) - self.spread[row]) / n
+        self.counts[row] += 1
+
+    def adjust(self, proba, landmarks, scale):
+        """Blend centroid evidence into `proba` in place and return it"""
+        rows = self.bound_rows
+        if len(rows) != len(proba):
+            return proba
+        counts = self.counts[rows]
+        personalized = np.flatnonzero(counts >= self.min_samples)
+        if len(personalized) == 0:
+            return proba
+
+        personal_rows = rows[personalized]
+        diff = (landmarks - self.centroids[personal_rows]) / scale
+        distances = np.einsum('ij,ij->i', diff, diff) / diff.shape[1]
+        logits = -0.5 * distances / self.spread[personal_rows]
+        logits -= logits.max()
+        weights = np.exp(logits)
+        weights /= weights.sum()
+
+        n = counts[personalized].mean()
+        blend = self.max_weight * n / (n + self.half_weight_samples)
+        mass = proba[personalized].sum()
+        proba[personalized] = (1.0 - blend) * proba[personalized] + blend * mass * weights
+        return proba
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, names=np.array(self.names), centroids=self.centroids,
+                 spread=self.spread, counts=self.counts)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Restore centroids saved by `save`, if the file exists"""
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            names = [str(n) for n in data["names"]]
+            for i, name in enumerate(names):
+                row = self._row(name)
+                self.centroids[row] = data["centroids"][i]
+                self.spread[row] = data["spread"][i]
+                self.counts[row] = data["counts"][i]
+        return True
+
+    def personalized_classes(self):
+        return [name for name, count in zip(self.names, self.counts) if count >= self.min_samples]
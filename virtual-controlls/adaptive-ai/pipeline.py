@@ -0,0 +1,156 @@
+import time
+from collections import deque
+from threading import Thread, Condition, Event, Lock
+
+
+class LatestFrameQueue:
+    """Bounded hand-off between pipeline stages where the newest item always wins.
+
+    Putting into a full queue replaces the oldest item instead of blocking, so a
+    slow consumer never makes the producer fall behind real time.
+    """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.cond = Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next item, or None on timeout or once the queue is closed"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class CaptureThread(Thread):
+    """Reads frames from a cv2.VideoCapture as fast as the camera delivers them.
+
+    Only every `stride`-th frame is forwarded, and reads are spaced at least
+    `min_interval` seconds apart (0 = camera rate). Capture properties requested
+    with `set_properties` are applied from this thread between two reads, so
+    the capture object is never touched concurrently; so is its optional
+    `drain(cap)`, which discards frames the camera buffered. With `stats` (a
+    PipelineStats), read times and stride skips are recorded; `profiler`
+    (a latency_stats.ThreadProfiler) is polled once per read.
+    """
+
+    def __init__(self, cap, output, stride=1, stats=None, profiler=None):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.output = output
+        self.stride = stride
+        self.min_interval = 0.0
+        self.stats = stats
+        self.profiler = profiler
+        self.pending_properties = None
+        self.pending_drain = None
+        self.properties_lock = Lock()
+        self.stop_event = Event()
+        self.frames_read = 0
+        self.error = None  # Exception that ended the thread, for the caller to report
+
+    def set_properties(self, properties, drain=None):
+        """Queue {cv2.CAP_PROP_*: value} settings, then `drain(cap)`, for the capture thread"""
+        with self.properties_lock:
+            self.pending_properties = dict(properties)
+            self.pending_drain = drain
+
+    def run(self):
+        # Always close the output, so a failing read cannot leave the later stages waiting
+        try:
+            while not self.stop_event.is_set():
+                if self.profiler is not None:
+                    self.profiler.poll()
+                if self.pending_properties is not None:
+                    with self.properties_lock:
+                        properties, self.pending_properties = self.pending_properties, None
+                        drain, self.pending_drain = self.pending_drain, None
+                    for prop, value in properties.items():
+                        self.cap.set(prop, value)
+                    if drain is not None:
+                        drain(self.cap)
+                if self.min_interval:
+                    time.sleep(self.min_interval)
+                read_started = time.perf_counter()
+                ret, frame = self.cap.read()
+                if not ret:
+                    time.sleep(0.005)
+                    continue
+                captured_at = time.monotonic()
+                self.frames_read += 1
+                if self.stats is not None:
+                    self.stats.record("capture", time.perf_counter() - read_started)
+                if self.frames_read % self.stride == 0:
+                    self.output.put((captured_at, frame))
+                elif self.stats is not None:
+                    self.stats.count("stride_skipped")
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            if self.profiler is not None:
+                self.profiler.close()
+            self.output.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class StageThread(Thread):
+    """Applies `func` to every item taken from `source` and forwards the result to `sink`.
+
+    The sink is closed however the thread ends; an exception raised by
+    `func` is kept in `error` so the caller can report it. `profiler` (a
+    latency_stats.ThreadProfiler) is polled once per item or timeout.
+    """
+
+    def __init__(self, source, sink, func, profiler=None):
+        super().__init__(daemon=True)
+        self.source = source
+        self.sink = sink
+        self.func = func
+        self.profiler = profiler
+        self.stop_event = Event()
+        self.processed = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.profiler is not None:
+                    self.profiler.poll()
+                item = self.source.get(timeout=0.1)
+                if item is None:
+                    if self.source.closed:
+                        break
+                    continue
+                self.sink.put(self.func(item))
+                self.processed += 1
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            if self.profiler is not None:
+                self.profiler.close()
+            self.sink.close()
+
+    def stop(self):
+        self.stop_event.set()
@@ -1,16 +1,31 @@
 import cv2
-import mediapipe as mp
-import numpy as np
-import joblib
-import json
-from datetime import datetime
 import os
 import time
-from threading import Thread, Lock, Event
-from collections import deque, Counter
-import shutil
+import sys
+import json
+import subprocess
+from threading import Thread, Event
+from collections import Counter
+import argparse
 import pyautogui
 
+from pipeline import LatestFrameQueue, CaptureThread, StageThread
+from model_bundle import load_bundle, bundle_from_pickles
+from recognizer import GestureRecognizer, CONFIDENCE_THRESHOLD
+from prediction_cache import PredictionCache
+from gesture_actions import ActionChooser, ActionExecutor, KeyMappingWatcher
+from sample_sink import SampleSink, SampleIndex
+from online_head import CentroidHead
+from hud import GestureHud, SkeletonDrawer
+
+# Camera front-end modules shared with the mouse controllers live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hand_tracking import RoiHandTracker
+from motion_gate import MotionGate
+from qos_governor import QosGovernor, QualityLevel, QUALITY_LEVELS, describe_level
+from power_states import PowerManager, drain_capture
+from latency_stats import PipelineStats, ProfileTrigger
+
 # Configure pyautogui settings
 pyautogui.FAILSAFE = True  # Move mouse to corner to abort
 pyautogui.PAUSE = 0.05  # Reduce delay between actions
@@ -18,77 +33,79 @@ pyautogui.PAUSE = 0.05  # Reduce delay between actions
 # Get the workspace root directory
 WORKSPACE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 
-# Constants for Slow Adaptation
-WINDOW_SIZE = 8  # Increased from 3 to 8 for more stability
-CONFIDENCE_THRESHOLD = 0.3  # Lowered for higher sensitivity
+# Constants for Slow Adaptation (window and confidence settings live in recognizer.py)
 SAMPLES_BEFORE_RETRAIN = 100  # Increased from 20 to 40
 GESTURE_FREQUENCY_THRESHOLD = 1000  # Increased from 500 to 1000
 RETRAIN_COOLDOWN = 600  # 10 minutes between retrains
-MODEL_PATH = os.path.join(WORKSPACE_ROOT, "models", "gesture_model.pkl")
-LABEL_ENCODER_PATH = os.path.join(WORKSPACE_ROOT, "models", "label_encoder.pkl")
+MAX_USER_SAMPLES = 2000  # Newest samples per gesture used for retraining; older ones are compacted away
+BUNDLE_PATH = os.path.join(WORKSPACE_ROOT, "models", "gesture_model.bundle")
 USER_DATA_DIR = os.path.join(WORKSPACE_ROOT, "DATA", "user_data")
-ORIGINAL_DATA_DIR = os.path.join(WORKSPACE_ROOT, "DATA", "gesture_data")
+ORIGINAL_DATA_DIR = os.path.join(WORKSPACE_ROOT, "DATA")
+RETRAIN_SCRIPT = os.path.join(WORKSPACE_ROOT, "retrain_personalized.py")
+ONLINE_HEAD_PATH = os.path.join(WORKSPACE_ROOT, "models", "online_head.npz")
+KEY_MAPPINGS_PATH = os.path.join(WORKSPACE_ROOT, "key_mappings.json")  # Written by app.py's /update_mapping
+CUSTOM_GESTURES_PATH = os.path.join(WORKSPACE_ROOT, "custom_gestures.json")
 FRAME_SKIP = 2
-
-# Gesture cooldown settings
-UNDO_REDO_COOLDOWN = 1.0  # 1 second cooldown for undo/redo
-last_gesture_time = {}  # Track cooldown per gesture type
+LATENCY_BUDGET_MS = 33.0  # Per camera frame; the QoS governor trades quality to stay inside it
+DEFAULT_QUALITY = QualityLevel(640, 480, 1, FRAME_SKIP)  # Starting point for the governor
+MAX_HANDS = 1  # Default; --max-hands 2 classifies both hands of an operator in one batch
+ROI_REDETECT_INTERVAL = 30  # Processed frames between full-frame hand detections
 
 # Initialize directories
 os.makedirs(os.path.join(WORKSPACE_ROOT, "gesture_output"), exist_ok=True)
 os.makedirs(USER_DATA_DIR, exist_ok=True)
 
-# Load model and label encoder
-model = joblib.load(MODEL_PATH)
-label_encoder = joblib.load(LABEL_ENCODER_PATH)
-scaler = joblib.load(os.path.join(WORKSPACE_ROOT, "models", "scaler.pkl"))
+# Load the model bundle (compiled forest, scaler and class names in one
+# memory-mapped file), converting the legacy joblib pickles on first run
+if os.path.exists(BUNDLE_PATH):
+    bundle = load_bundle(BUNDLE_PATH)
+else:
+    print("Model bundle not found, converting joblib models...")
+    bundle = bundle_from_pickles(os.path.join(WORKSPACE_ROOT, "models"))
+    bundle.save(BUNDLE_PATH)
 
-# MediaPipe setup
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
+# MediaPipe setup: landmarks run on a tracked crop around the hand, with a
+# full-frame detection every ROI_REDETECT_INTERVAL frames or when it is lost
+hands = RoiHandTracker(
+    redetect_interval=ROI_REDETECT_INTERVAL,
     static_image_mode=False,
-    max_num_hands=1,
+    max_num_hands=MAX_HANDS,
+    model_complexity=DEFAULT_QUALITY.model_complexity,
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5
 )
-mp_draw = mp.solutions.drawing_utils
+# Skips MediaPipe on empty, static scenes and reuses the result for a still hand
+motion_gate = MotionGate(hands)
+
+# Per-stage latency histograms (dumped to virtual-controlls/runtime) and a
+# cProfile window on SIGUSR1 or when runtime/predict_live.profile appears
+stats = PipelineStats("predict_live")
+profiler = ProfileTrigger("predict_live")
+
+# Held poses reuse the forest's probabilities from a small LRU cache
+prediction_cache = PredictionCache()
+
+# Frame -> per-hand predictions; the optional centroid head is attached with --online
+recognizer = GestureRecognizer(bundle, hands=motion_gate, max_hands=MAX_HANDS, stats=stats,
+                               cache=prediction_cache)
+action_chooser = ActionChooser()
+
+# Compiles the dashboard's key mappings into action_chooser's dispatch table
+# and swaps in a new one whenever the files change (started in main)
+mapping_watcher = KeyMappingWatcher(action_chooser, KEY_MAPPINGS_PATH, CUSTOM_GESTURES_PATH)
+
+# Adjusts resolution, landmark model and frame stride to the hardware (set up in main)
+governor = None
+
+# Drops to a low frame rate and resolution while no hand is around
+power = PowerManager("predict_live")
 
 # Thread-safe variables
-model_lock = Lock()
 retraining_event = Event()
 is_retraining = False
 last_retrain_time = 0
 last_save_time = {}
 
-class GestureWindow:
-    def __init__(self, size=WINDOW_SIZE):
-        self.predictions = deque(maxlen=size)
-        self.confidences = deque(maxlen=size)
-        self.landmarks = deque(maxlen=size)
-        
-    def add(self, prediction, confidence, landmarks):
-        self.predictions.append(prediction)
-        self.confidences.append(confidence)
-        self.landmarks.append(landmarks)
-        
-    def is_stable(self):
-        if len(self.predictions) < WINDOW_SIZE:
-            return False
-        
-        # Check if all predictions are the same and confidences are very high
-        same_prediction = len(set(self.predictions)) == 1
-        all_confident = all(conf >= CONFIDENCE_THRESHOLD for conf in self.confidences)
-        return same_prediction and all_confident
-    
-    def get_stable_data(self):
-        if not self.is_stable():
-            return None
-        return {
-            "label": self.predictions[0],
-            "landmarks": list(self.landmarks),
-            "confidence": float(np.mean(self.confidences))
-        }
-
 class GestureFrequencyTracker:
     def __init__(self, frequency_threshold=GESTURE_FREQUENCY_THRESHOLD):
         self.gesture_counts = Counter()
@@ -112,9 +129,16 @@ class GestureFrequencyTracker:
         return self.gesture_counts[gesture]
 
 # Initialize trackers
-gesture_window = GestureWindow()
 frequency_tracker = GestureFrequencyTracker()
 
+# Per-label sample counts, seeded once from disk and kept current by the writer
+sample_index = SampleIndex(USER_DATA_DIR, SAMPLES_BEFORE_RETRAIN)
+sample_index.reconcile()
+
+# Background writer for auto-collected samples
+sample_sink = SampleSink(USER_DATA_DIR, index=sample_index)
+sample_sink.start()
+
 def save_stable_gesture(gesture_data):
     """Save stable gesture data to user directory only if approved for learning"""
     label = gesture_data["label"]
@@ -129,22 +153,8 @@ def save_stable_gesture(gesture_data):
     if not frequency_tracker.is_approved_for_learning(label):
         return
         
-    gesture_dir = os.path.join(USER_DATA_DIR, label)
-    os.makedirs(gesture_dir, exist_ok=True)
-    
-    # Save each frame from the stable window
-    for idx, landmarks in enumerate(gesture_data["landmarks"]):
-        sample_data = {
-            "landmarks": [[point.x, point.y, point.z] for point in landmarks],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "label": label,
-            "confidence": gesture_data["confidence"]
-        }
-        
-        filename = f"auto_{int(time.time())}_{idx}.json"
-        filepath = os.path.join(gesture_dir, filename)
-        with open(filepath, 'w') as f:
-            json.dump(sample_data, f, indent=2)
+    # Hand the stable window to the background writer
+    sample_sink.submit(label, gesture_data["landmarks"], gesture_data["confidence"])
 
 def should_retrain():
     """Check if any gesture class has enough samples for retraining"""
@@ -155,17 +165,11 @@ def should_retrain():
     if now - last_retrain_time < RETRAIN_COOLDOWN:
         return False
         
-    for gesture_dir in os.listdir(USER_DATA_DIR):
-        full_path = os.path.join(USER_DATA_DIR, gesture_dir)
-        if os.path.isdir(full_path):
-            sample_count = len([f for f in os.listdir(full_path) if f.endswith('.json')])
-            if sample_count >= SAMPLES_BEFORE_RETRAIN:
-                return True
-    return False
+    return sample_index.any_ready()
 
 def retrain_model():
-    """Background process to retrain the model with new data"""
-    global model, is_retraining, last_retrain_time
+    """Retrain in a separate process and hot-swap the model if it did not get worse"""
+    global is_retraining, last_retrain_time
     
     if is_retraining:
         return
@@ -175,174 +179,322 @@ def retrain_model():
     print("🔄 Starting model retraining...")
     
     try:
-        # Here we would normally call your train_gesture_model.py
-        # For now, we'll simulate retraining with a delay
-        time.sleep(2)  # Simulate training time
+        # A separate, lower-priority process keeps training off this process's GIL
+        kwargs = {}
+        if os.name == 'nt':  # Windows
+            kwargs['creationflags'] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        result = subprocess.run(
+            [sys.executable, RETRAIN_SCRIPT,
+             "--data-dir", ORIGINAL_DATA_DIR,
+             "--user-data-dir", USER_DATA_DIR,
+             "--bundle", BUNDLE_PATH,
+             "--max-user-samples", str(MAX_USER_SAMPLES)],
+            capture_output=True,
+            text=True,
+            cwd=WORKSPACE_ROOT,
+            **kwargs
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else
+                               f"exit code {result.returncode}")
+        report = json.loads(result.stdout.strip().splitlines()[-1])
         
-        with model_lock:
-            # Save the new model
-            joblib.dump(model, MODEL_PATH)
+        print(f"⏱️ Retraining took {report['train_seconds']:.1f}s, validation accuracy "
+              f"{report['old_accuracy']:.3f} -> {report['new_accuracy']:.3f} ({report['accuracy_delta']:+.3f})")
+        if report["fresh_new_accuracy"] is not None:
+            print(f"   Recent samples: {report['fresh_old_accuracy']:.3f} -> {report['fresh_new_accuracy']:.3f}")
+        if report["regressed_classes"]:
+            print(f"   Worse on: {', '.join(report['regressed_classes'])}")
+        # Samples the retrain saw have been used; wait for fresh ones (persisted across restarts)
+        sample_index.mark_consumed(report["user_counts"])
+        if report["accepted"]:
+            # Single reference assignment; the inference loop picks it up on its next frame
+            recognizer.bundle = load_bundle(BUNDLE_PATH)
             print("✨ Model updated with personalized data!")
-            
-        # Clear processed samples
-        for gesture_dir in os.listdir(USER_DATA_DIR):
-            full_path = os.path.join(USER_DATA_DIR, gesture_dir)
-            if os.path.isdir(full_path):
-                shutil.rmtree(full_path)
-                os.makedirs(full_path)
+            sample_sink.compact(MAX_USER_SAMPLES)
+        else:
+            print("↩️ New model did worse on validation or recent data, keeping the current model")
                 
     except Exception as e:
         print(f"❌ Retraining failed: {str(e)}")
     finally:
         is_retraining = False
+        retraining_event.clear()
 
-def perform_gesture_action(gesture, confidence):
-    """Perform keyboard action based on detected gesture"""
-    global last_gesture_time
-    
-    current_time = time.time()
-    
-    # Only apply cooldown for undo/redo gestures
-    if gesture in ["undo", "redo"]:
-        if current_time - last_gesture_time.get(gesture, 0) < UNDO_REDO_COOLDOWN:
-            return
-        last_gesture_time[gesture] = current_time
-    
-    try:
-        if gesture == "up":
-            pyautogui.press('up')
-        elif gesture == "down":
-            pyautogui.press('down')
-        elif gesture == "left":
-            pyautogui.press('left')
-        elif gesture == "right":
-            pyautogui.press('right')
-        elif gesture == "undo":
-            pyautogui.hotkey('ctrl', 'z')
-        elif gesture == "redo":
-            pyautogui.hotkey('ctrl', 'y')
-        elif gesture == "stop":
-            # Press 'q' to quit the application
-            pyautogui.press('q')
-    except Exception as e:
-        print(f"Error performing gesture action: {str(e)}")
+def send_keys(keys):
+    """Press one key or a hotkey (runs on the action executor thread)"""
+    if len(keys) == 1:
+        pyautogui.press(keys[0])
+    else:
+        pyautogui.hotkey(*keys)
 
-def process_frame(frame):
-    # Convert the BGR image to RGB
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
-    
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            # Extract landmarks
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                landmarks.append(lm)
-            
-            # Draw landmarks (minimal visualization)
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            
-            # Make prediction
-            flat_landmarks = np.array([[lm.x, lm.y, lm.z] for lm in landmarks]).flatten()
-            flat_landmarks = flat_landmarks.reshape(1, -1)
-            
-            # Scale the input
-            scaled_input = scaler.transform(flat_landmarks)
-            
-            with model_lock:
-                prediction_proba = model.predict_proba(scaled_input)[0]
-                prediction = label_encoder.inverse_transform([np.argmax(prediction_proba)])[0]
-                confidence = np.max(prediction_proba)
-            
-            # Swap left and right labels
-            if prediction == "left":
-                prediction = "right"
-            elif prediction == "right":
-                prediction = "left"
-            
-            # Update gesture window and trackers
-            gesture_window.add(prediction, confidence, landmarks)
-            frequency_tracker.add_gesture(prediction, confidence)
-            
-            # Perform action if confidence is high enough
-            if confidence >= CONFIDENCE_THRESHOLD:
-                perform_gesture_action(prediction, confidence)
-            
-            # Display the gesture name and confidence
-            cv2.putText(frame, f"{prediction} ({confidence:.2%})", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            
-            # Display learning progress with a progress bar
-            progress = frequency_tracker.get_gesture_count(prediction)
-            progress_percent = min(progress / GESTURE_FREQUENCY_THRESHOLD * 100, 100)
-            
-            # Progress bar dimensions and position
-            bar_width = 300
-            bar_height = 30
-            bar_x = 10
-            bar_y = 70
-            
-            # Draw progress bar background (darker)
-            cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), (50, 50, 50), -1)
-            
-            # Draw filled portion of progress bar (brighter)
-            filled_width = int(bar_width * progress_percent / 100)
-            if filled_width > 0:
-                cv2.rectangle(frame, (bar_x, bar_y), (bar_x + filled_width, bar_y + bar_height), 
-                            (0, 255, 0) if progress >= GESTURE_FREQUENCY_THRESHOLD else (0, 165, 255), -1)
-            
-            # Draw progress text with white background for better visibility
-            progress_text = f"Learning Progress: {progress}/{GESTURE_FREQUENCY_THRESHOLD} ({progress_percent:.1f}%)"
-            cv2.putText(frame, progress_text, (10, 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 3)  # White outline
-            cv2.putText(frame, progress_text, (10, 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 1)  # Black text
-            
-            # Draw status with white background
-            status = "APPROVED ✓" if frequency_tracker.is_approved_for_learning(prediction) else "Learning..."
-            status_color = (0, 255, 0) if frequency_tracker.is_approved_for_learning(prediction) else (0, 165, 255)
-            cv2.putText(frame, f"Status: {status}", (10, 120), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 3)  # White outline
-            cv2.putText(frame, f"Status: {status}", (10, 120), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 1)  # Colored text
+# pyautogui blocks for at least PAUSE per call, so key presses leave the camera loop
+action_executor = ActionExecutor(send_keys, stats=stats)
+
+def perform_gesture_action(gesture, confidence, hand=None):
+    """Queue the keyboard action for a detected gesture, following its repeat/cooldown policy"""
+    keys = action_chooser.choose(gesture, hand)
+    if keys is not None:
+        action_executor.submit(keys)
+
+def infer_frame(frame):
+    """Run hand detection and gesture classification on a BGR frame"""
+    # Follow the governor's landmark model choice on the thread that runs MediaPipe
+    if governor is not None and hands.model_complexity != governor.level.model_complexity:
+        hands.set_model_complexity(governor.level.model_complexity)
+        motion_gate.reset()
+    return recognizer.infer_frame(frame)
+
+# Overlay rendering (skipped entirely in --headless mode)
+skeleton_drawer = SkeletonDrawer()
+gesture_huds = []  # One stacked HUD per hand slot, created on first use
+
+def hud_for(slot):
+    while len(gesture_huds) <= slot:
+        gesture_huds.append(GestureHud(GESTURE_FREQUENCY_THRESHOLD, top=len(gesture_huds) * GestureHud.HEIGHT))
+    return gesture_huds[slot]
+
+def act_on_detections(detections):
+    """Update trackers, fire actions and collect stable samples for one frame's detections"""
+    for hand_landmarks, prediction, confidence, stable_data, hand in detections:
+        # Update trackers
+        frequency_tracker.add_gesture(prediction, confidence)
+        
+        # Perform action if confidence is high enough
+        if confidence >= CONFIDENCE_THRESHOLD:
+            perform_gesture_action(prediction, confidence, hand)
+        
+        # Check for stable gestures
+        if stable_data:
+            save_stable_gesture(stable_data)
             
-            # Check for stable gestures
-            if gesture_window.is_stable():
-                stable_data = gesture_window.get_stable_data()
-                if stable_data:
-                    save_stable_gesture(stable_data)
-                    
-                    # Check if we should retrain
-                    if should_retrain() and not retraining_event.is_set():
-                        retraining_event.set()
-                        Thread(target=retrain_model).start()
-    
+            # Check if we should retrain
+            if should_retrain() and not retraining_event.is_set():
+                retraining_event.set()
+                Thread(target=retrain_model).start()
+
+def draw_overlay(frame, detections):
+    """Draw landmarks and the learning HUD for one frame's detections"""
+    for slot, (hand_landmarks, prediction, confidence, stable_data, hand) in enumerate(detections):
+        # Draw landmarks (minimal visualization)
+        skeleton_drawer.draw(frame, hand_landmarks.landmark)
+        
+        # Display the gesture name, confidence and learning progress
+        hud_for(slot).draw(
+            frame, prediction, confidence,
+            progress=frequency_tracker.get_gesture_count(prediction),
+            approved=frequency_tracker.is_approved_for_learning(prediction)
+        )
+    return frame
+
+def handle_detections(frame, detections, headless=False, captured_at=None):
+    """Act on one frame's detections and, unless headless, draw the overlay"""
+    act_on_detections(detections)
+    if captured_at is not None and detections:
+        stats.record("capture_to_action", time.monotonic() - captured_at)
+    if not headless:
+        with stats.stage("draw"):
+            draw_overlay(frame, detections)
     return frame
 
-# Initialize camera
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+def process_frame(frame, headless=False, captured_at=None):
+    with governor.stage("inference"):
+        detections = infer_frame(frame)
+    with governor.stage("actions"):
+        return handle_detections(frame, detections, headless, captured_at)
+
+def capture_settings():
+    """Capture properties and frame stride for the current power tier and quality level"""
+    if power.active:
+        width, height, stride = governor.level.width, governor.level.height, governor.level.frame_stride
+    else:
+        width, height, stride = power.tier.width, power.tier.height, 1
+    return {cv2.CAP_PROP_FRAME_WIDTH: width, cv2.CAP_PROP_FRAME_HEIGHT: height,
+            cv2.CAP_PROP_FPS: power.camera_fps}, stride
+
+def update_capture_state(hand_visible):
+    """Advance the power tier and quality level; returns new capture settings if either changed"""
+    changed = False
+    if power.update(hand_visible) is not None:
+        print(f"💤 Power state -> {power.tier.name}")
+        changed = True
+    # Idle frames say nothing about the cost of real ones
+    if power.active:
+        level = governor.update()
+        if level is not None:
+            print(f"🎚️ Quality -> {describe_level(level)}")
+            changed = True
+    return capture_settings() if changed else None
+
+def run_sequential(cap, headless=False):
+    """Capture, infer and act one frame at a time on the main thread"""
+    frame_count = 0
+    stride = capture_settings()[1]
+    while True:
+        frame_count += 1
+        power.throttle()
+        
+        # Skip frames for performance
+        read_started = time.perf_counter()
+        ret, frame = cap.read()
+        captured_at = time.monotonic()
+        if ret:
+            stats.record("capture", time.perf_counter() - read_started)
+        if not ret or frame_count % stride != 0:
+            stats.count("stride_skipped" if ret else "read_failed")
+            if not headless:
+                cv2.waitKey(1)
+            continue
+
+        # Process frame
+        frame = process_frame(frame, headless, captured_at)
+        profiler.poll()
+        stats.maybe_dump()
+        settings = update_capture_state(bool(recognizer.last_detections))
+        if settings is not None:
+            properties, stride = settings
+            for prop, value in properties.items():
+                cap.set(prop, value)
+            if power.active:
+                # Start from a live frame, not one buffered at the idle rate
+                drain_capture(cap)
+        if headless:
+            continue
+        cv2.imshow("Gesture Recognition", frame)
 
-print("System started. Press 'q' to quit.")
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            break
 
-frame_count = 0
-while True:
-    frame_count += 1
+def run_pipelined(cap, headless=False):
+    """Run capture, inference and action/render as overlapping stages.
+
+    Each stage hands its newest output to the next through a single-slot
+    queue, so stale frames are dropped rather than queued and throughput is
+    bounded by the slowest stage instead of the sum of all of them.
+    """
+    frames = LatestFrameQueue(maxsize=1)
+    inferred = LatestFrameQueue(maxsize=1)
+    # Worker threads profile themselves: cProfile only sees the thread that enabled it
+    capture = CaptureThread(cap, frames, stride=capture_settings()[1], stats=stats,
+                            profiler=profiler.thread_profiler("capture"))
+
+    def timed_inference(item):
+        with governor.stage("inference"):
+            return item[0], item[1], infer_frame(item[1])
+
+    inference = StageThread(frames, inferred, timed_inference, profiler=profiler.thread_profiler("inference"))
+    capture.start()
+    inference.start()
+
+    handled = 0
+    started = time.monotonic()
+    try:
+        while True:
+            item = inferred.get(timeout=0.1)
+            if item is not None:
+                captured_at, frame, detections = item
+                with governor.stage("actions"):
+                    frame = handle_detections(frame, detections, headless, captured_at)
+                handled += 1
+                stats.set_counter("stale_frames_dropped", frames.dropped + inferred.dropped)
+                profiler.poll()
+                stats.maybe_dump()
+                settings = update_capture_state(bool(detections))
+                if settings is not None:
+                    properties, capture.stride = settings
+                    capture.set_properties(properties, drain=drain_capture if power.active else None)
+                    capture.min_interval = power.frame_interval
+                if not headless:
+                    cv2.imshow("Gesture Recognition", frame)
+            elif inferred.closed:
+                break
+
+            if not headless and cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+    finally:
+        capture.stop()
+        inference.stop()
+        capture.join(timeout=1.0)
+        inference.join(timeout=1.0)
+
+    for name, stage in (("Capture", capture), ("Inference", inference)):
+        if stage.error is not None:
+            print(f"❌ {name} stage failed: {str(stage.error)}")
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(f"Pipeline: {capture.frames_read} frames captured, {handled} handled "
+          f"({handled / elapsed:.1f}/s), {frames.dropped + inferred.dropped} stale frames dropped")
+
+def main():
+    global governor
     
-    # Skip frames for performance
-    ret, frame = cap.read()
-    if not ret or frame_count % FRAME_SKIP != 0:
-        cv2.waitKey(1)
-        continue
-
-    # Process frame
-    frame = process_frame(frame)
-    cv2.imshow("Gesture Recognition", frame)
-
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-print("Session ended.")
+    parser = argparse.ArgumentParser(description='Live gesture recognition')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Run capture, inference and actions in separate threads')
+    parser.add_argument('--online', action='store_true',
+                        help='Continuously adapt to the user with per-class centroids')
+    parser.add_argument('--headless', action='store_true',
+                        help='Skip all drawing and windows (stop with Ctrl+C)')
+    parser.add_argument('--budget-ms', type=float, default=LATENCY_BUDGET_MS,
+                        help='Per-frame latency budget for the quality governor')
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help='Keep 640x480, the full landmark model and FRAME_SKIP')
+    parser.add_argument('--max-hands', type=int, default=MAX_HANDS,
+                        help='Hands to track and classify per frame (one batched classifier call)')
+    args = parser.parse_args()
+
+    if args.max_hands != MAX_HANDS:
+        hands.set_max_num_hands(args.max_hands)
+        recognizer.set_max_hands(args.max_hands)
+
+    levels = (DEFAULT_QUALITY,) if args.fixed_quality else QUALITY_LEVELS
+    governor = QosGovernor(args.budget_ms, levels=levels, start_level=levels.index(DEFAULT_QUALITY),
+                           parallel=args.pipelined)
+
+    if args.online:
+        online_head = CentroidHead()
+        if online_head.load(ONLINE_HEAD_PATH):
+            print(f"Loaded online personalization for: {', '.join(online_head.personalized_classes())}")
+        recognizer.set_online_head(online_head)
+
+    # Initialize camera
+    cap = cv2.VideoCapture(0)
+    for prop, value in capture_settings()[0].items():
+        cap.set(prop, value)
+
+    if args.headless:
+        print("System started in headless mode. Press Ctrl+C to quit.")
+    else:
+        print("System started. Press 'q' to quit.")
+
+    mapping_watcher.reload()
+    mapping_watcher.start()
+    action_executor.start()
+    try:
+        if args.pipelined:
+            run_pipelined(cap, args.headless)
+        else:
+            run_sequential(cap, args.headless)
+    except KeyboardInterrupt:
+        pass
+
+    mapping_watcher.stop()
+    action_executor.close()
+    cap.release()
+    if not args.headless:
+        cv2.destroyAllWindows()
+    sample_sink.close()
+    print(motion_gate.summary())
+    print(hands.summary())
+    print(prediction_cache.summary())
+    print(recognizer.stage_summary())
+    print(f"Quality: {describe_level(governor.level)} ({governor.changes} changes)")
+    power.close()
+    profiler.close()
+    stats.maybe_dump(force=True)
+    if recognizer.online_head is not None:
+        recognizer.online_head.save(ONLINE_HEAD_PATH)
+    print("Session ended.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from itertools import islice
+from collections import OrderedDict
+import numpy as np
+
+
+class PredictionCache:
+    """LRU memo of classifier probabilities for near-identical hand poses.
+
+    Entries are keyed by the hand's landmarks relative to the wrist, rounded
+    to `step` (normalized image units), plus the wrist position rounded to
+    the coarser `wrist_step`: the forest is trained on absolute coordinates,
+    so a pose may only reuse a result while the hand also stays in roughly
+    the same place. Landmark jitter easily pushes one of 63 coordinates over
+    a rounding edge, so a lookup that misses the exact key also accepts the
+    `recent` most recently used entries when every coordinate is within one
+    step of the landmarks they were computed for. Values are the forest's
+    own probabilities, before any online-head adjustment. `clear()` must be
+    called whenever the model changes.
+    """
+
+    def __init__(self, maxsize=256, step=0.01, wrist_step=0.05, recent=2):
+        self.maxsize = maxsize
+        self.step = step
+        self.wrist_step = wrist_step
+        self.recent = recent
+        self.entries = OrderedDict()  # key -> (relative landmarks, wrist, probabilities)
+        self.relative = np.empty((21, 3), dtype=np.float32)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, landmarks):
+        wrist = landmarks[0]
+        np.subtract(landmarks, wrist, out=self.relative)
+        relative = np.rint(self.relative / self.step).astype(np.int16)
+        position = np.rint(wrist[:2] / self.wrist_step).astype(np.int16)
+        return relative.tobytes() + position.tobytes()
+
+    def get(self, landmarks):
+        """Cached probabilities for one (21, 3) landmark array, or None"""
+        key = self._key(landmarks)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        else:
+            entry = self._near_recent(landmarks[0])
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def _near_recent(self, wrist):
+        for key in list(islice(reversed(self.entries), self.recent)):
+            relative, entry_wrist, _ = entry = self.entries[key]
+            if (np.abs(entry_wrist - wrist[:2]).max() < self.wrist_step
+                    and np.abs(relative - self.relative).max() < self.step):
+                self.entries.move_to_end(key)
+                return entry
+        return None
+
+    def put(self, landmarks, probabilities):
+        key = self._key(landmarks)
+        self.entries[key] = (self.relative.copy(), np.array(landmarks[0, :2]),
+                             np.array(probabilities, dtype=np.float64))
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Prediction cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)"
@@ -0,0 +1,273 @@
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+
+from landmark_buffer import LandmarkBuffer
+from temporal_fusion import GestureFusion
+from finger_rules import pose_code
+from features import compute_features
+
+# Constants for Slow Adaptation
+WINDOW_SIZE = 8  # Increased from 3 to 8 for more stability
+CONFIDENCE_THRESHOLD = 0.3  # Lowered for higher sensitivity
+# Summed class probability over the window needed to commit / keep a stable gesture
+STABLE_ENTER_EVIDENCE = WINDOW_SIZE * CONFIDENCE_THRESHOLD
+STABLE_EXIT_EVIDENCE = STABLE_ENTER_EVIDENCE / 2
+
+# One classified hand; `hand` is MediaPipe's handedness label ("Left"/"Right")
+# or the hand's slot index when no handedness is known
+Detection = namedtuple("Detection", "hand_landmarks prediction confidence stable_data hand")
+
+
+def display_label(class_name):
+    """Name shown and acted on for a model class"""
+    # Swap left and right labels
+    if class_name == "left":
+        return "right"
+    elif class_name == "right":
+        return "left"
+    return class_name
+
+
+def class_label(class_index, model_bundle):
+    """Gesture name for a model output index"""
+    return display_label(model_bundle.classes[class_index])
+
+
+class GestureRecognizer:
+    """The per-frame recognition path: landmarks in, per-hand predictions out.
+
+    Owns the preallocated landmark buffers and temporal fusion, and knows
+    nothing about cameras, windows, key presses or wall-clock time, so the
+    live loop and the offline replay harness run exactly the same code.
+
+    `bundle` may be replaced at any time (hot-swap after retraining); the
+    next frame resets fusion for the new classes. `hands` is only needed
+    for `infer_frame` and must return `(results, skipped)` like MotionGate.
+    Each detection is a `Detection`. All hands of a frame are classified in
+    one batched `predict_proba` call, and each hand keeps its own temporal
+    fusion keyed by handedness, so the two hands of an operator never mix
+    their windows. Classification is a cascade: the bundle's finger-rule
+    table resolves unambiguous poses first (when `rules` is on and the
+    bundle has one), then `cache` (a PredictionCache) serves poses seen
+    recently, and only the remaining frames run the forest; `stage_frames`
+    counts the frames each stage resolved. With `stats` (a PipelineStats),
+    every internal stage is timed.
+    """
+
+    def __init__(self, bundle, hands=None, max_hands=1, online_head=None, stats=None, cache=None, rules=True,
+                 window_size=WINDOW_SIZE, confidence_threshold=CONFIDENCE_THRESHOLD,
+                 enter_evidence=STABLE_ENTER_EVIDENCE, exit_evidence=STABLE_EXIT_EVIDENCE):
+        self.bundle = bundle
+        self.hands = hands
+        self.stats = stats
+        self.cache = cache
+        self.rules = rules
+        self.cached_probabilities = None
+        self.stage_frames = {"rules": 0, "cache": 0, "forest": 0}
+        self.online_head = online_head
+        if online_head is not None:
+            online_head.bind(bundle.classes)
+
+        # Preallocated per-frame buffers: landmarks/scaled features and the RGB frame
+        self.set_max_hands(max_hands)
+        self.rgb_buffer = None
+        self.fusion_settings = dict(
+            enter_evidence=enter_evidence,
+            exit_evidence=exit_evidence,
+            confidence_threshold=confidence_threshold
+        )
+        self.window_size = window_size
+        self.fusions = {}  # Hand key -> GestureFusion
+        self.fused_bundle = bundle
+        self.last_detections = None
+
+    def set_max_hands(self, max_hands):
+        self.max_hands = max_hands
+        self.landmark_buffer = LandmarkBuffer(max_hands)
+
+    def set_online_head(self, online_head):
+        self.online_head = online_head
+        if online_head is not None:
+            online_head.bind(self.fused_bundle.classes)
+
+    def reset(self):
+        """Forget temporal state, e.g. between unrelated recordings"""
+        self.fusions.clear()
+        self.last_detections = None
+
+    def _fusion(self, hand):
+        fusion = self.fusions.get(hand)
+        if fusion is None:
+            fusion = self.fusions[hand] = GestureFusion(
+                self.window_size, len(self.fused_bundle.classes), **self.fusion_settings
+            )
+        return fusion
+
+    def _active_bundle(self):
+        # Read the model reference once so a hot-swap never splits a frame
+        active = self.bundle
+        if active is not self.fused_bundle:
+            # The model was swapped: restart temporal fusion and drop its cached predictions
+            self.fusions.clear()
+            if self.cache is not None:
+                self.cache.clear()
+            if self.online_head is not None:
+                self.online_head.bind(active.classes)
+            self.fused_bundle = active
+            self.last_detections = None
+        return active
+
+    def infer_frame(self, frame):
+        """Run hand detection and gesture classification on a BGR frame"""
+        self._active_bundle()
+
+        # Convert the BGR image to RGB into a reused buffer
+        if self.rgb_buffer is None or self.rgb_buffer.shape != frame.shape:
+            self.rgb_buffer = np.empty_like(frame)
+        t0 = time.perf_counter()
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        t1 = time.perf_counter()
+        results, skipped = self.hands.process(self.rgb_buffer)
+        if self.stats is not None:
+            self.stats.record("cvtColor", t1 - t0)
+            if skipped:
+                self.stats.count("hands_skipped")
+            else:
+                self.stats.record("hands.process", time.perf_counter() - t1)
+        if skipped and self.last_detections is not None:
+            # Same landmarks as the last inferred frame: reuse its classification
+            return self.last_detections
+        return self.infer_landmarks(results.multi_hand_landmarks or [],
+                                    getattr(results, "multi_handedness", None))
+
+    def infer_landmarks(self, multi_hand_landmarks, multi_handedness=None):
+        """Classify hands given as MediaPipe landmark lists (anything with .landmark[i].x/.y/.z)"""
+        active = self._active_bundle()
+        landmark_buffer = self.landmark_buffer
+        online_head = self.online_head
+        stats = self.stats
+
+        hand_landmark_lists = multi_hand_landmarks[:self.max_hands]
+        n_hands = len(hand_landmark_lists)
+        if n_hands == 0:
+            self.last_detections = []
+            return self.last_detections
+
+        # Copy every hand into the float32 buffer
+        t0 = time.perf_counter()
+        for hand_index, hand_landmarks in enumerate(hand_landmark_lists):
+            landmark_buffer.fill(hand_index, hand_landmarks.landmark)
+
+        # Cascade: finger rules, then cached predictions, then the forest
+        probabilities = self._resolve_by_rules(n_hands, active)
+        if probabilities is not None:
+            stage = "rules"
+        else:
+            probabilities = self._cached(n_hands, len(active.classes))
+            stage = "cache"
+        if probabilities is None:
+            stage = "forest"
+            # Featurize and scale all hands and classify them as one (n_hands, width) batch
+            t_scale = time.perf_counter()
+            if active.feature_set != "raw":
+                scaled_input = compute_features(landmark_buffer.raw[:n_hands], active.feature_set)
+                if active.feature_columns is not None:
+                    scaled_input = scaled_input[:, active.feature_columns]
+                scaled_input -= active.scaler_mean
+                scaled_input /= active.scaler_scale
+            elif active.feature_columns is not None:
+                # Importance-pruned model: only its columns are gathered and scaled
+                scaled_input = landmark_buffer.scale_columns(n_hands, active.feature_columns,
+                                                             active.scaler_mean, active.scaler_scale)
+            else:
+                scaled_input = landmark_buffer.scale_hands(n_hands, active.scaler_mean, active.scaler_scale)
+            t1 = time.perf_counter()
+
+            # One classifier call for all hands (the engine's reused output buffer; fusion copies rows)
+            probabilities = active.forest.predict_proba(scaled_input)
+            if stats is not None:
+                stats.record("scale", t1 - t_scale)
+                stats.record("predict_proba", time.perf_counter() - t1)
+            if self.cache is not None:
+                for hand_index in range(n_hands):
+                    self.cache.put(landmark_buffer.hand(hand_index), probabilities[hand_index])
+        self.stage_frames[stage] += 1
+        if stats is not None:
+            stats.record(f"{stage}_frame", time.perf_counter() - t0)
+
+        detections = []
+        for hand_index, hand_landmarks in enumerate(hand_landmark_lists):
+            hand = self._hand_key(hand_index, multi_handedness, detections)
+            prediction_proba = probabilities[hand_index]
+            if online_head is not None:
+                online_head.adjust(prediction_proba, landmark_buffer.flat(hand_index), active.landmark_scale)
+            class_index = int(np.argmax(prediction_proba))
+            confidence = float(prediction_proba[class_index])
+            prediction = class_label(class_index, active)
+
+            # Fuse class probabilities over time to find stable gestures
+            fusion = self._fusion(hand)
+            fusion.add(prediction_proba, landmark_buffer.hand(hand_index))
+            stable_data = fusion.get_stable_data()
+            if stable_data:
+                stable_data["label"] = class_label(stable_data["index"], active)
+
+                # Continuous personalization from confirmed stable frames
+                if online_head is not None and class_index == stable_data["index"]:
+                    online_head.update(active.classes[class_index], landmark_buffer.flat(hand_index),
+                                       active.landmark_scale)
+
+            detections.append(Detection(hand_landmarks, prediction, confidence, stable_data, hand))
+
+        self.last_detections = detections
+        return detections
+
+    def _resolve_by_rules(self, n_hands, active):
+        """Rule-table probabilities when every hand's pose code is decisive, else None"""
+        if not self.rules or active.rule_table is None:
+            return None
+        codes = []
+        for hand_index in range(n_hands):
+            code = pose_code(self.landmark_buffer.hand(hand_index))
+            if not active.rule_decisive[code]:
+                return None
+            codes.append(code)
+        # Fancy indexing copies the rows, so the online head may adjust them in place
+        return active.rule_table[codes]
+
+    def stage_summary(self):
+        total = sum(self.stage_frames.values())
+        if not total:
+            return "Resolved frames: none"
+        shares = ", ".join(f"{stage} {count / total:.0%}" for stage, count in self.stage_frames.items())
+        return f"Resolved frames: {shares}"
+
+    def _cached(self, n_hands, n_classes):
+        """Cached probabilities for every filled hand, or None if any of them misses"""
+        cache = self.cache
+        if cache is None:
+            return None
+        cached = []
+        for hand_index in range(n_hands):
+            probabilities = cache.get(self.landmark_buffer.hand(hand_index))
+            if probabilities is None:
+                return None
+            cached.append(probabilities)
+        if self.cached_probabilities is None or self.cached_probabilities.shape != (self.max_hands, n_classes):
+            self.cached_probabilities = np.empty((self.max_hands, n_classes), dtype=np.float64)
+        # Copied into a scratch buffer, as the online head adjusts probabilities in place
+        for hand_index, probabilities in enumerate(cached):
+            self.cached_probabilities[hand_index] = probabilities
+        return self.cached_probabilities[:n_hands]
+
+    @staticmethod
+    def _hand_key(hand_index, multi_handedness, detections):
+        """Handedness label for a hand, falling back to its slot when unknown or ambiguous"""
+        if multi_handedness is not None and hand_index < len(multi_handedness):
+            label = multi_handedness[hand_index].classification[0].label
+            # Two hands reported with the same handedness must not share one window
+            if all(detection.hand != label for detection in detections):
+                return label
+        return hand_index
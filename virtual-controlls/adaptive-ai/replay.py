@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import namedtuple
+import cv2
+import numpy as np
+
+from model_bundle import load_bundle, bundle_from_pickles
+from recognizer import GestureRecognizer, CONFIDENCE_THRESHOLD, display_label
+from gesture_actions import ActionChooser
+from prediction_cache import PredictionCache
+
+WORKSPACE_ROOT = os.path.abspath(os.path.dirname(__file__))
+BUNDLE_PATH = os.path.join(WORKSPACE_ROOT, "models", "gesture_model.bundle")
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Recorded landmarks wrapped to look like MediaPipe's results
+Landmark = namedtuple("Landmark", "x y z")
+HandLandmarks = namedtuple("HandLandmarks", "landmark")
+
+
+class ReplayClock:
+    """Deterministic clock that advances a fixed step per replayed frame"""
+
+    def __init__(self, fps):
+        self.step = 1.0 / fps
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.step
+
+
+def video_frames(path):
+    """(sequence, source, frame, expected) for every frame of a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Cannot open video: {path}")
+    index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield path, f"{os.path.basename(path)}#{index}", frame, None
+        index += 1
+    cap.release()
+
+
+def image_frames(directory):
+    """(sequence, source, frame, expected) for the images of a directory, in name order"""
+    for file in sorted(os.listdir(directory)):
+        if not file.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        frame = cv2.imread(os.path.join(directory, file))
+        if frame is not None:
+            yield directory, file, frame, None
+
+
+def landmark_files(path):
+    """Landmark .json files for a file, a DATA/<label> directory or a whole DATA directory"""
+    if os.path.isfile(path):
+        return [path]
+    files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.json'))
+    if files:
+        return files
+    for label in sorted(os.listdir(path)):
+        label_dir = os.path.join(path, label)
+        # Hidden directories hold caches such as DATA/.dataset_cache, not samples
+        if os.path.isdir(label_dir) and not label.startswith('.'):
+            files.extend(sorted(os.path.join(label_dir, f) for f in os.listdir(label_dir) if f.endswith('.json')))
+    return files
+
+
+def landmark_frames(path):
+    """(sequence, source, hands, expected) for recorded samples such as DATA/<label>/sample_*.json"""
+    for file in landmark_files(path):
+        try:
+            with open(file) as f:
+                sample = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            continue
+        points = np.asarray(sample.get("landmarks", []), dtype=np.float64).reshape(-1, 3)
+        hands = [HandLandmarks([Landmark(*p) for p in points])] if len(points) == 21 else []
+        # The directory is the label, as in train_gesture_model.py; the "label" stored in
+        # some files is stale (DATA/undo samples say "none")
+        label = os.path.basename(os.path.dirname(file))
+        yield os.path.dirname(file), os.path.relpath(file, path) if os.path.isdir(path) else file, hands, label
+
+
+def open_hands(clock, max_hands=1):
+    """MediaPipe front-end configured like predict_live, on the replay clock"""
+    sys.path.append(os.path.dirname(WORKSPACE_ROOT))
+    from hand_tracking import RoiHandTracker
+    from motion_gate import MotionGate
+    hands = RoiHandTracker(static_image_mode=False, max_num_hands=max_hands,
+                           min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    return MotionGate(hands, clock=clock)
+
+
+def replay(frames, recognizer, from_landmarks, clock, emit, timings=True):
+    """Feed every frame through the recognizer and emit one record per frame; returns a summary"""
+    chooser = ActionChooser(clock=clock)
+    infer_times = []
+    correct = stable_correct = labelled = 0
+    sequence = None
+    started = time.perf_counter()
+
+    for index, (frame_sequence, source, data, expected) in enumerate(frames):
+        if frame_sequence != sequence:
+            # Independent recordings must not share fusion state
+            recognizer.reset()
+            sequence = frame_sequence
+
+        t0 = time.perf_counter()
+        detections = recognizer.infer_landmarks(data) if from_landmarks else recognizer.infer_frame(data)
+        infer_times.append(time.perf_counter() - t0)
+
+        hands = []
+        for hand_landmarks, prediction, confidence, stable_data, hand in detections:
+            # Same rule as predict_live: confident frames go through the gesture policies
+            keys = chooser.choose(prediction, hand) if confidence >= CONFIDENCE_THRESHOLD else None
+            hands.append({
+                "prediction": prediction,
+                "confidence": round(confidence, 6),
+                "stable": stable_data["label"] if stable_data else None,
+                "action": "+".join(keys) if keys else None,
+            })
+
+        expected_display = display_label(expected) if expected is not None else None
+        if expected_display is not None and hands:
+            labelled += 1
+            correct += hands[0]["prediction"] == expected_display
+            stable_correct += hands[0]["stable"] == expected_display
+
+        record = {"frame": index, "t": round(clock(), 6), "source": source,
+                  "expected": expected_display, "hands": hands}
+        if timings:
+            record["infer_ms"] = round(infer_times[-1] * 1000, 3)
+        emit(record)
+        clock.tick()
+
+    elapsed = time.perf_counter() - started
+    infer_ms = np.asarray(infer_times) * 1000 if infer_times else np.zeros(1)
+    return {
+        "frames": len(infer_times),
+        "labelled_frames": labelled,
+        "accuracy": correct / labelled if labelled else None,
+        "stable_accuracy": stable_correct / labelled if labelled else None,
+        "infer_ms_mean": float(infer_ms.mean()),
+        "infer_ms_p95": float(np.percentile(infer_ms, 95)),
+        "wall_seconds": elapsed,
+        "realtime_factor": clock() / elapsed if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded input through the gesture recognizer')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', help='Video file to replay')
+    source.add_argument('--images', help='Directory of frames, replayed in file name order')
+    source.add_argument('--landmarks', help='Landmark .json file, DATA/<label> directory or DATA directory')
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help='Model bundle to use')
+    parser.add_argument('--fps', type=float, default=30.0, help='Frame rate of the replay clock')
+    parser.add_argument('--max-hands', type=int, default=1, help='Hands to track and classify per frame')
+    parser.add_argument('--cache', action='store_true', help='Use the prediction cache like predict_live')
+    parser.add_argument('--no-rules', action='store_true',
+                        help="Always run the forest, ignoring the bundle's finger-rule table")
+    parser.add_argument('--output', help='Write per-frame JSON lines here instead of stdout')
+    parser.add_argument('--no-timings', action='store_true',
+                        help='Leave timings out of the per-frame records (for exact diffs)')
+    args = parser.parse_args()
+
+    if os.path.exists(args.bundle):
+        bundle = load_bundle(args.bundle)
+    else:
+        bundle = bundle_from_pickles(os.path.join(WORKSPACE_ROOT, "models"))
+
+    clock = ReplayClock(args.fps)
+    cache = PredictionCache() if args.cache else None
+    if args.landmarks:
+        frames = landmark_frames(args.landmarks)
+        recognizer = GestureRecognizer(bundle, cache=cache, rules=not args.no_rules)
+    else:
+        frames = video_frames(args.video) if args.video else image_frames(args.images)
+        recognizer = GestureRecognizer(bundle, hands=open_hands(clock, args.max_hands), max_hands=args.max_hands,
+                                       cache=cache, rules=not args.no_rules)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        summary = replay(frames, recognizer, bool(args.landmarks), clock,
+                         lambda record: out.write(json.dumps(record) + "\n"),
+                         timings=not args.no_timings)
+    finally:
+        if args.output:
+            out.close()
+
+    # The summary goes to stderr so stdout stays pure JSON lines
+    if cache is not None:
+        summary["cache_hits"], summary["cache_misses"] = cache.hits, cache.misses
+    summary["stage_frames"] = recognizer.stage_frames
+    if not args.landmarks:
+        # Measured cost of the full-frame and crop paths of the hand tracker
+        summary["hand_tracking"] = recognizer.hands.hands.timings()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
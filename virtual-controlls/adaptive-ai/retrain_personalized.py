@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime
+import numpy as np
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.ensemble import RandomForestClassifier
+
+from train_gesture_model import GESTURE_TYPES, FOREST_PARAMS, load_gesture_split, build_training_matrix
+from model_bundle import ModelBundle, load_bundle
+from finger_rules import learn_rule_table
+from features import compute_features, landmark_scale
+from sample_sink import read_shard, shard_path, read_consumed
+
+# predict_live.py swaps left and right after classification and files the
+# auto-collected samples under the displayed name; map them back to the
+# class names the model is trained on.
+DISPLAY_TO_MODEL_LABEL = {"left": "right", "right": "left"}
+
+
+def load_user_samples(user_data_dir, max_per_label):
+    """Most recent auto-collected samples per label from shards and legacy .json files.
+
+    Returns (samples, labels, fresh, totals): `fresh` flags the samples
+    collected after the label's consumed count, which no earlier retrain
+    has seen, and `totals` is the number of samples on disk per label
+    directory.
+    """
+    samples = []
+    labels = []
+    fresh = []
+    totals = {}
+    if not os.path.isdir(user_data_dir):
+        return samples, labels, fresh, totals
+    for label in sorted(os.listdir(user_data_dir)):
+        label_dir = os.path.join(user_data_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        landmarks = []
+        for file in sorted(os.listdir(label_dir)):
+            if not file.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(label_dir, file)) as f:
+                    landmarks.append(json.load(f)["landmarks"])
+            except (json.JSONDecodeError, KeyError, OSError):
+                continue
+        records = read_shard(shard_path(user_data_dir, label))
+        landmarks.extend(np.asarray(records["landmarks"], dtype=np.float64).tolist())
+
+        totals[label] = len(landmarks)
+        consumed = read_consumed(user_data_dir, label)
+        is_fresh = [i >= consumed for i in range(len(landmarks))][-max_per_label:]
+        landmarks = landmarks[-max_per_label:]
+        samples.extend(landmarks)
+        labels.extend([DISPLAY_TO_MODEL_LABEL.get(label, label)] * len(landmarks))
+        fresh.extend(is_fresh)
+    return samples, labels, fresh, totals
+
+
+def split_fresh_holdout(labels, fresh, holdout):
+    """Indices of the most recent `holdout` fraction of each label's fresh samples"""
+    labels = np.asarray(labels)
+    fresh_idx = np.flatnonzero(np.asarray(fresh, dtype=bool))
+    held_out = []
+    for label in np.unique(labels[fresh_idx]):
+        idx = fresh_idx[labels[fresh_idx] == label]
+        n_held_out = int(round(len(idx) * holdout))
+        if len(idx) >= 2:
+            n_held_out = min(max(n_held_out, 1), len(idx) - 1)
+        held_out.extend(idx[len(idx) - n_held_out:])
+    return np.asarray(held_out, dtype=np.intp)
+
+
+def bundle_accuracy(bundle, samples, labels):
+    """Accuracy of a bundle on raw (N, 21, 3) landmarks, computed the way predict_live does"""
+    accuracy, _ = class_accuracies(bundle, samples, labels)
+    return accuracy
+
+
+def class_accuracies(bundle, samples, labels):
+    """(overall accuracy, {label: accuracy}) of a bundle on raw (N, 21, 3) landmarks"""
+    labels = np.asarray(labels)
+    predicted = np.asarray(bundle.classes)[np.argmax(bundle.predict_proba(samples), axis=1)]
+    correct = predicted == labels
+    per_class = {str(label): float(np.mean(correct[labels == label])) for label in np.unique(labels)}
+    return float(np.mean(correct)), per_class
+
+
+def retrain(data_dir, user_data_dir, bundle_path, holdout=0.2, tolerance=0.0,
+            max_user_samples=2000, seed=42):
+    """Train on original plus user data and install the model only if it is not worse.
+
+    Both models are compared on the fixed validation split of DATA, which
+    neither of them was trained on, overall and for every gesture, and on
+    a held-out slice of the fresh user samples: the installed model was
+    trained on earlier user samples, so scoring it on those would favour
+    it. The candidate is installed only if it is at most `tolerance` worse
+    on each of these.
+    """
+    started = time.perf_counter()
+    current = load_bundle(bundle_path)
+
+    gesture_types = GESTURE_TYPES + [c for c in current.classes if c not in GESTURE_TYPES]
+    samples, labels, val_samples, val_labels = load_gesture_split(data_dir, gesture_types, verbose=False)
+    if len(val_samples) == 0:
+        raise ValueError("No validation samples to compare the models on")
+    user_samples, user_labels, fresh, user_counts = load_user_samples(user_data_dir, max_user_samples)
+    user_samples = np.asarray(user_samples, dtype=np.float64).reshape(-1, 21, 3)
+    user_labels = np.asarray(user_labels, dtype=np.str_)
+
+    held_out = split_fresh_holdout(user_labels, fresh, holdout)
+    test_samples, test_labels = user_samples[held_out], user_labels[held_out]
+    user_train = np.ones(len(user_samples), dtype=bool)
+    user_train[held_out] = False
+    train_samples = np.concatenate([np.asarray(samples, dtype=np.float64), user_samples[user_train]])
+    train_labels = np.concatenate([labels, user_labels[user_train]])
+
+    # Augmentation is applied to the training part only
+    np.random.seed(seed)
+    X_train, y_train = build_training_matrix(train_samples, train_labels)
+    le = LabelEncoder()
+    y_train = le.fit_transform(y_train)
+    rule_table = learn_rule_table(X_train, y_train, len(le.classes_))
+    # The candidate is trained on the same feature set and columns as the installed model
+    feature_set, feature_columns = current.feature_set, current.feature_columns
+    raw_scale = landmark_scale(X_train, feature_set, feature_columns)
+    features = compute_features(X_train, feature_set)
+    if feature_columns is not None:
+        features = features[:, feature_columns]
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(features)
+    # Keep the forest shape chosen by distill_forest.py, if the current model was distilled
+    clf = RandomForestClassifier(**dict(FOREST_PARAMS, **current.metadata.get("forest_params", {})))
+    clf.fit(X_train, y_train)
+
+    candidate = ModelBundle.from_sklearn(clf, scaler, le.classes_, rule_table=rule_table,
+                                         feature_set=feature_set, landmark_scale=raw_scale,
+                                         feature_columns=feature_columns, metadata={
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "n_samples": int(len(X_train)),
+        "n_user_samples": len(user_samples),
+        "n_estimators": clf.n_estimators,
+        "max_depth": clf.max_depth,
+        "forest_params": current.metadata.get("forest_params", {}),
+        "personalized": True,
+    })
+
+    old_accuracy, old_classes = class_accuracies(current, val_samples, val_labels)
+    new_accuracy, new_classes = class_accuracies(candidate, val_samples, val_labels)
+    candidate.metadata["test_accuracy"] = new_accuracy
+    regressed = [label for label in new_classes if new_classes[label] < old_classes[label] - tolerance]
+    accepted = new_accuracy >= old_accuracy - tolerance and not regressed
+
+    # The fresh holdout checks the user's own recent poses; skipped when there are none
+    fresh_old_accuracy = fresh_new_accuracy = None
+    if len(test_labels):
+        fresh_old_accuracy = bundle_accuracy(current, test_samples, test_labels)
+        fresh_new_accuracy = bundle_accuracy(candidate, test_samples, test_labels)
+        accepted = accepted and fresh_new_accuracy >= fresh_old_accuracy - tolerance
+
+    if accepted:
+        # Keep the previous artifact for manual rollback, then swap atomically
+        shutil.copy2(bundle_path, bundle_path + ".prev")
+        candidate.save(bundle_path)
+
+    return {
+        "accepted": accepted,
+        "train_seconds": time.perf_counter() - started,
+        "old_accuracy": old_accuracy,
+        "new_accuracy": new_accuracy,
+        "accuracy_delta": new_accuracy - old_accuracy,
+        "class_accuracy": {label: [old_classes[label], new_classes[label]] for label in new_classes},
+        "regressed_classes": regressed,
+        "fresh_old_accuracy": fresh_old_accuracy,
+        "fresh_new_accuracy": fresh_new_accuracy,
+        "n_validation": int(len(val_labels)),
+        "n_user_samples": len(user_samples),
+        "n_holdout": int(len(test_labels)),
+        # Samples on disk per user label directory when the retrain started
+        "user_counts": user_counts,
+        "bundle_path": bundle_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Retrain the gesture model with auto-collected user data')
+    parser.add_argument('--data-dir', required=True, help='Directory with the original DATA/<gesture> samples')
+    parser.add_argument('--user-data-dir', required=True, help='Directory with auto-collected user samples')
+    parser.add_argument('--bundle', required=True, help='Model bundle to evaluate against and replace')
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help='Fraction of the new user samples held out for comparison')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Accept the new model if its accuracy drops by at most this much')
+    parser.add_argument('--max-user-samples', type=int, default=2000,
+                        help='Most recent user samples used per gesture')
+    args = parser.parse_args()
+
+    # Stay out of the camera process's way
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+    report = retrain(args.data_dir, args.user_data_dir, args.bundle,
+                     holdout=args.holdout, tolerance=args.tolerance,
+                     max_user_samples=args.max_user_samples)
+    # The last line of stdout is the machine-readable report
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import queue
+from threading import Thread, Lock, Event
+import numpy as np
+
+SHARD_NAME = "samples.bin"
+# Sidecar next to each shard: how many of the label's samples a retrain already used
+CONSUMED_NAME = "samples.consumed"
+
+# One fixed-size record per auto-collected frame; shards are plain arrays of these
+SAMPLE_DTYPE = np.dtype([
+    ("landmarks", "<f4", (21, 3)),
+    ("confidence", "<f4"),
+    ("timestamp", "<f8"),
+])
+
+
+def shard_path(data_dir, label):
+    return os.path.join(data_dir, label, SHARD_NAME)
+
+
+def consumed_path(data_dir, label):
+    return os.path.join(data_dir, label, CONSUMED_NAME)
+
+
+def read_consumed(data_dir, label):
+    """Samples of `label` (legacy .json files first, then shard records) used by the last retrain"""
+    try:
+        with open(consumed_path(data_dir, label)) as f:
+            return int(json.load(f)["consumed"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+
+
+def write_consumed(data_dir, label, count):
+    path = consumed_path(data_dir, label)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump({"consumed": int(count)}, f)
+    os.replace(tmp_path, path)
+
+
+def shard_sample_count(path):
+    """Number of complete records in a shard, from its size alone"""
+    try:
+        return os.path.getsize(path) // SAMPLE_DTYPE.itemsize
+    except OSError:
+        return 0
+
+
+def read_shard(path):
+    """Memory-map a shard as a structured array, ignoring a torn trailing record"""
+    count = shard_sample_count(path)
+    if count == 0:
+        return np.zeros(0, dtype=SAMPLE_DTYPE)
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode="r", shape=(count,))
+
+
+def json_sample_count(label_dir):
+    """Legacy one-file-per-sample .json files in a label directory"""
+    return sum(1 for f in os.listdir(label_dir) if f.endswith('.json'))
+
+
+def count_samples_on_disk(data_dir):
+    """Per-label sample counts from legacy .json files and binary shards"""
+    counts = {}
+    if not os.path.isdir(data_dir):
+        return counts
+    for label in os.listdir(data_dir):
+        label_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        json_count = json_sample_count(label_dir)
+        counts[label] = json_count + shard_sample_count(shard_path(data_dir, label))
+    return counts
+
+
+class SampleIndex:
+    """In-memory per-label sample counts for the retrain check.
+
+    Seeded once from disk, incremented by the SampleSink after every write
+    and reconciled with a full directory scan only occasionally (from the
+    writer thread), so `any_ready()` never touches the filesystem. A label is
+    ready once it gained `ready_threshold` samples since the last
+    `mark_consumed()`; consumed counts are persisted next to each shard, so
+    a restart does not count old samples as new.
+    """
+
+    def __init__(self, data_dir, ready_threshold):
+        self.data_dir = data_dir
+        self.ready_threshold = ready_threshold
+        self.lock = Lock()
+        self.counts = {}
+        self.consumed = {}
+        self.ready = set()
+
+    def _set(self, label, count):
+        self.counts[label] = count
+        if count - self.consumed.get(label, 0) >= self.ready_threshold:
+            self.ready.add(label)
+        else:
+            self.ready.discard(label)
+
+    def reconcile(self):
+        """Replace the counts with a fresh scan of the data directory"""
+        counts = count_samples_on_disk(self.data_dir)
+        consumed = {label: read_consumed(self.data_dir, label) for label in counts}
+        with self.lock:
+            self.counts = {}
+            self.consumed = consumed
+            self.ready = set()
+            for label, count in counts.items():
+                self._set(label, count)
+        return counts
+
+    def add(self, label, count):
+        with self.lock:
+            self._set(label, self.counts.get(label, 0) + count)
+
+    def mark_consumed(self, used_counts):
+        """Record {label: samples on disk} that a retrain has used, in memory and on disk"""
+        with self.lock:
+            for label, count in used_counts.items():
+                try:
+                    write_consumed(self.data_dir, label, count)
+                except OSError as e:
+                    print(f"❌ Failed to record used samples for {label}: {str(e)}")
+                self.consumed[label] = count
+                self._set(label, self.counts.get(label, 0))
+
+    def count(self, label):
+        return self.counts.get(label, 0)
+
+    def any_ready(self):
+        """True when some label has at least `ready_threshold` samples"""
+        return bool(self.ready)
+
+
+class SampleSink(Thread):
+    """Background writer for auto-collected personalization samples.
+
+    The camera loop only enqueues landmark arrays; this thread groups them
+    into batches and appends each batch to a single binary shard per label
+    (`<data_dir>/<label>/samples.bin`), calling fsync at most every
+    `fsync_interval` seconds. Nothing on the frame path touches the disk.
+    """
+
+    def __init__(self, data_dir, index=None, max_pending=256, batch_size=64,
+                 fsync_interval=5.0, reconcile_interval=300.0):
+        super().__init__(daemon=True)
+        self.data_dir = data_dir
+        self.index = index
+        self.reconcile_interval = reconcile_interval
+        self.last_reconcile = time.monotonic()
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.write_lock = Lock()
+        self.stop_event = Event()
+        self.dirty = set()
+        self.last_fsync = time.monotonic()
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, label, landmarks, confidence):
+        """Queue (n, 21, 3) landmarks for `label` without blocking the caller"""
+        try:
+            self.pending.put_nowait((label, landmarks, confidence, time.time()))
+            return True
+        except queue.Full:
+            self.dropped += len(landmarks)
+            return False
+
+    def run(self):
+        while not (self.stop_event.is_set() and self.pending.empty()):
+            try:
+                batch = [self.pending.get(timeout=0.5)]
+            except queue.Empty:
+                self._maybe_fsync()
+                self._maybe_reconcile()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            self._maybe_fsync()
+            self._maybe_reconcile()
+        self._maybe_fsync(force=True)
+
+    def _write(self, batch):
+        by_label = {}
+        for label, landmarks, confidence, timestamp in batch:
+            records = np.zeros(len(landmarks), dtype=SAMPLE_DTYPE)
+            records["landmarks"] = landmarks
+            records["confidence"] = confidence
+            records["timestamp"] = timestamp
+            by_label.setdefault(label, []).append(records)
+
+        with self.write_lock:
+            for label, chunks in by_label.items():
+                path = shard_path(self.data_dir, label)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                records = np.concatenate(chunks)
+                try:
+                    with open(path, "ab") as f:
+                        f.write(records.tobytes())
+                    self.written += len(records)
+                    self.dirty.add(path)
+                    if self.index is not None:
+                        self.index.add(label, len(records))
+                except OSError as e:
+                    print(f"❌ Failed to write samples for {label}: {str(e)}")
+
+    def _maybe_fsync(self, force=False):
+        now = time.monotonic()
+        if not self.dirty or (not force and now - self.last_fsync < self.fsync_interval):
+            return
+        with self.write_lock:
+            for path in self.dirty:
+                try:
+                    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+            self.dirty.clear()
+        self.last_fsync = now
+
+    def _maybe_reconcile(self):
+        now = time.monotonic()
+        if self.index is None or now - self.last_reconcile < self.reconcile_interval:
+            return
+        # Hold the write lock so no batch lands between the scan and the swap
+        with self.write_lock:
+            self.index.reconcile()
+        self.last_reconcile = now
+
+    def compact(self, keep):
+        """Cut every shard down to its newest `keep` records, dropping only consumed ones.
+
+        Retraining reads at most the newest `keep` samples per label, so
+        older records only take disk space. Holds the write lock, so no
+        batch is appended while a shard is rewritten.
+        """
+        dropped_total = 0
+        if not os.path.isdir(self.data_dir):
+            return dropped_total
+        with self.write_lock:
+            for label in os.listdir(self.data_dir):
+                path = shard_path(self.data_dir, label)
+                count = shard_sample_count(path)
+                if count <= keep:
+                    continue
+                consumed = read_consumed(self.data_dir, label)
+                json_count = json_sample_count(os.path.join(self.data_dir, label))
+                dropped = min(count - keep, max(consumed - json_count, 0))
+                if dropped <= 0:
+                    continue
+                tmp_path = f"{path}.tmp{os.getpid()}"
+                try:
+                    with open(tmp_path, "wb") as f:
+                        f.write(np.ascontiguousarray(read_shard(path)[dropped:count]).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, path)
+                    self.dirty.discard(path)
+                    write_consumed(self.data_dir, label, consumed - dropped)
+                    dropped_total += dropped
+                except OSError as e:
+                    print(f"❌ Failed to compact samples for {label}: {str(e)}")
+            if self.index is not None:
+                self.index.reconcile()
+        return dropped_total
+
+    def close(self, timeout=5.0):
+        """Flush everything still queued and stop the writer"""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
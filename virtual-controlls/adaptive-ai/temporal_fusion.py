@@ -0,0 +1,101 @@
+import numpy as np
+
+# Running sums are rebuilt from the ring after this many updates to cancel
+# floating point drift from repeated add/subtract
+RESYNC_INTERVAL = 4096
+
+
+class GestureFusion:
+    """Temporal smoothing of per-frame class probabilities with hysteresis.
+
+    A fixed-size ring buffer keeps the last `size` probability vectors and a
+    running per-class sum, so every update and decision is O(1) in the window
+    length. The summed probability of a class over the window is its
+    "evidence":
+
+    - a class becomes stable once it is the top class and its evidence reaches
+      `enter_evidence` (three confident frames are enough, while borderline
+      frames need most of the window);
+    - the stable class is kept until its evidence falls below `exit_evidence`
+      or another class meets the enter rule, so a single noisy frame never
+      flips or clears the decision.
+    """
+
+    def __init__(self, size, n_classes, enter_evidence, exit_evidence,
+                 confidence_threshold=0.0, landmark_shape=(21, 3)):
+        self.size = size
+        self.enter_evidence = enter_evidence
+        self.exit_evidence = exit_evidence
+        self.confidence_threshold = confidence_threshold
+
+        self.probabilities = np.zeros((size, n_classes), dtype=np.float64)
+        self.evidence = np.zeros(n_classes, dtype=np.float64)
+        self.predicted = np.full(size, -1, dtype=np.intp)
+        self.confidences = np.zeros(size, dtype=np.float64)
+        self.landmarks = np.zeros((size,) + tuple(landmark_shape), dtype=np.float32)
+
+        self.head = 0
+        self.count = 0
+        self.updates = 0
+        self.stable_index = None
+
+    def reset(self, n_classes=None):
+        if n_classes is not None and n_classes != self.probabilities.shape[1]:
+            self.probabilities = np.zeros((self.size, n_classes), dtype=np.float64)
+            self.evidence = np.zeros(n_classes, dtype=np.float64)
+        self.probabilities[...] = 0.0
+        self.evidence[...] = 0.0
+        self.predicted[...] = -1
+        self.head = 0
+        self.count = 0
+        self.stable_index = None
+
+    def add(self, probabilities, landmarks=None):
+        """Push one frame's class probabilities and return the stable class index (or None)"""
+        slot = self.head
+        row = self.probabilities[slot]
+        self.evidence -= row
+        row[...] = probabilities
+        self.evidence += row
+
+        best = int(np.argmax(row))
+        self.predicted[slot] = best
+        self.confidences[slot] = row[best]
+        if landmarks is not None:
+            self.landmarks[slot] = landmarks
+
+        self.head = (slot + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.updates += 1
+        if self.updates % RESYNC_INTERVAL == 0:
+            self.probabilities.sum(axis=0, out=self.evidence)
+
+        self._decide()
+        return self.stable_index
+
+    def _decide(self):
+        top = int(np.argmax(self.evidence))
+        if top != self.stable_index and self.evidence[top] >= self.enter_evidence:
+            self.stable_index = top
+        elif self.stable_index is not None and self.evidence[self.stable_index] < self.exit_evidence:
+            self.stable_index = None
+
+    def is_stable(self):
+        return self.stable_index is not None
+
+    def stable_confidence(self):
+        """Mean probability of the stable class over the filled part of the window"""
+        if self.stable_index is None:
+            return 0.0
+        return float(self.evidence[self.stable_index] / self.count)
+
+    def get_stable_data(self):
+        """Landmarks of the frames in the window that agree with the stable class"""
+        if self.stable_index is None:
+            return None
+        agree = (self.predicted == self.stable_index) & (self.confidences >= self.confidence_threshold)
+        return {
+            "index": self.stable_index,
+            "landmarks": self.landmarks[agree],
+            "confidence": self.stable_confidence(),
+        }
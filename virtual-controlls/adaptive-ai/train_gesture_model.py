@@ -1,11 +1,19 @@
 import os
-import json
+import time
+import zlib
+import argparse
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
+from sklearn.inspection import permutation_importance
 import joblib
+from datetime import datetime
+
+from model_bundle import ModelBundle, PICKLE_FEATURES_NAME, save_pickle_features
+from dataset_cache import load_dataset
+from features import FEATURE_WIDTHS, DEFAULT_FEATURE_SET, compute_features, feature_name, landmark_scale
+from finger_rules import learn_rule_table, rule_table_summary
 
 def augment_sample(landmarks, noise_range=0.02, rotation_range=0.1, scale_range=0.1):
     """Add variations to landmarks for data augmentation"""
@@ -30,6 +38,23 @@ def augment_sample(landmarks, noise_range=0.02, rotation_range=0.1, scale_range=
     
     return scaled.tolist()
 
+def augment_batch(landmarks, noise_range=0.02, rotation_range=0.1, scale_range=0.1):
+    """augment_sample for an (N, 21, 3) array, with its own noise, rotation and scale per sample"""
+    n = len(landmarks)
+    noisy = landmarks + np.random.normal(0, noise_range, landmarks.shape)
+
+    # Random rotation around z-axis
+    theta = np.random.uniform(-rotation_range, rotation_range, n)
+    rotation = np.zeros((n, 3, 3))
+    rotation[:, 0, 0] = rotation[:, 1, 1] = np.cos(theta)
+    rotation[:, 0, 1] = -np.sin(theta)
+    rotation[:, 1, 0] = np.sin(theta)
+    rotation[:, 2, 2] = 1
+    rotated = np.einsum("npi,nij->npj", noisy, rotation)
+
+    scale = np.random.uniform(1 - scale_range, 1 + scale_range, n)
+    return rotated * scale[:, None, None]
+
 def create_negative_samples(landmarks, num_samples=5):
     """Create negative samples by significantly altering the gesture"""
     negative_samples = []
@@ -43,138 +68,249 @@ def create_negative_samples(landmarks, num_samples=5):
     return negative_samples
 
 # Load data
-base_dir ="virtual-controlls/adaptive-ai/DATA"
-gesture_types = ['stop', 'left', 'right', 'up', 'down', 'none', 'undo', 'redo']
-X = []
-y = []
+DEFAULT_DATA_DIR = "virtual-controlls/adaptive-ai/DATA"
+GESTURE_TYPES = ['stop', 'left', 'right', 'up', 'down', 'none', 'undo', 'redo']
 
-try:
-    print(f"Looking for gesture data in: {os.path.abspath(base_dir)}")
-    
+# Forest settings shared by the full training run and personalized retraining
+FOREST_PARAMS = dict(
+    n_estimators=100,
+    max_depth=10,
+    min_samples_split=5,
+    min_samples_leaf=2,
+    class_weight='balanced',
+    random_state=42
+)
+
+# Share of DATA samples in the fixed validation split (see is_validation_path)
+VALIDATION_FRACTION = 0.2
+
+def is_validation_path(path, fraction=VALIDATION_FRACTION):
+    """Whether the DATA sample '<gesture>/<file>.json' belongs to the fixed validation split.
+
+    Decided by a hash of the path, so the split is the same in every run and
+    no model trained here, by retrain_personalized.py or by
+    distill_forest.py ever sees these samples; models can be compared on
+    them fairly.
+    """
+    return zlib.crc32(path.encode("utf-8")) % 1000 < fraction * 1000
+
+def load_gesture_samples(base_dir, gesture_types, verbose=True):
+    """DATA/<gesture>/*.json samples as an (N, 21, 3) float32 array and their labels.
+
+    Read through the columnar cache in dataset_cache.py, so only new or
+    changed sample files are parsed.
+    """
+    samples, labels, _ = _load_gesture_samples(base_dir, gesture_types, verbose)
+    return samples, labels
+
+def load_gesture_split(base_dir, gesture_types, verbose=True):
+    """load_gesture_samples split into (train_samples, train_labels, validation_samples, validation_labels)"""
+    samples, labels, paths = _load_gesture_samples(base_dir, gesture_types, verbose)
+    validation = np.array([is_validation_path(str(path)) for path in paths], dtype=bool)
+    return samples[~validation], labels[~validation], samples[validation], labels[validation]
+
+def _load_gesture_samples(base_dir, gesture_types, verbose):
+    dataset = load_dataset(base_dir, verbose=verbose)
+    labels = np.asarray(dataset.labels)
     for gesture_type in gesture_types:
-        data_dir = os.path.join(base_dir, gesture_type)
-        if not os.path.exists(data_dir):
-            print(f"Warning: Directory {data_dir} not found, skipping...")
-            continue
-            
-        files = [f for f in os.listdir(data_dir) if f.endswith('.json')]
-        print(f"Found {len(files)} samples for {gesture_type} gesture")
+        if verbose:
+            if not os.path.exists(os.path.join(base_dir, gesture_type)):
+                print(f"Warning: Directory {os.path.join(base_dir, gesture_type)} not found, skipping...")
+            else:
+                print(f"Found {np.count_nonzero(labels == gesture_type)} samples for {gesture_type} gesture")
+    selected = np.isin(labels, gesture_types)
+    if selected.all():
+        return dataset.landmarks, labels, dataset.paths
+    return dataset.landmarks[selected], labels[selected], dataset.paths[selected]
+
+def build_training_matrix(samples, labels, n_augmented=2):
+    """Flatten samples into feature rows, adding augmented copies of each one"""
+    samples = np.asarray(samples, dtype=np.float64).reshape(-1, 21, 3)
+    copies = [samples] + [augment_batch(samples) for _ in range(n_augmented)]
+    # Each original row is followed by its augmented copies
+    X = np.stack(copies, axis=1).reshape(-1, 21 * 3)
+    y = np.repeat(np.asarray(labels), 1 + n_augmented)
+    return X, y
+
+def feature_importances(clf, X_test, y_test, method='impurity'):
+    """Importance of every feature column, from the forest's impurity decrease or by permutation"""
+    if method == 'permutation':
+        return permutation_importance(clf, X_test, y_test, n_repeats=5, random_state=42).importances_mean
+    return clf.feature_importances_
+
+def fit_on_columns(features, y, train_idx, columns):
+    """Scaler and forest trained on only `columns` of the unscaled feature rows"""
+    scaler = StandardScaler().fit(features[:, columns])
+    clf = RandomForestClassifier(**FOREST_PARAMS)
+    clf.fit(scaler.transform(features[train_idx][:, columns]), y[train_idx])
+    return scaler, clf
+
+def single_row_latency(bundle, rows, repeats=300):
+    """Median seconds of one featurize + scale + predict_proba call on a single hand, as in predict_live"""
+    rows = np.asarray(rows, dtype=np.float32).reshape(len(rows), -1)
+    times = np.empty(repeats)
+    for i in range(repeats):
+        row = rows[i % len(rows)][None, :]
+        start = time.perf_counter()
+        bundle.forest.predict_proba(bundle.featurize(row))
+        times[i] = time.perf_counter() - start
+    return float(np.median(times))
+
+def prune_report(X, features, y, train_idx, test_idx, ranking, ks, classes, feature_set):
+    """Held-out accuracy and single-row latency of forests trained on the top k features"""
+    print("\nFeature pruning report:")
+    print(f"{'k':>4} {'accuracy':>9} {'ms/row':>8}")
+    for k in ks:
+        columns = np.sort(ranking[:k])
+        scaler, clf = fit_on_columns(features, y, train_idx, columns)
+        accuracy = accuracy_score(y[test_idx], clf.predict(scaler.transform(features[test_idx][:, columns])))
+        bundle = ModelBundle.from_sklearn(clf, scaler, classes, feature_set=feature_set,
+                                          landmark_scale=landmark_scale(X, feature_set, columns),
+                                          feature_columns=None if k == features.shape[1] else columns)
+        latency = single_row_latency(bundle, X[test_idx])
+        print(f"{k:>4} {accuracy:>9.3f} {latency * 1000:>8.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the gesture model and write the model bundle')
+    parser.add_argument('--feature-set', choices=sorted(FEATURE_WIDTHS), default=DEFAULT_FEATURE_SET,
+                        help='Features the forest is trained on (see features.py)')
+    parser.add_argument('--top-k', type=int,
+                        help='Retrain the scaler and forest on only the k most important features')
+    parser.add_argument('--importance', choices=['impurity', 'permutation'], default='impurity',
+                        help='How features are ranked for --top-k and --prune-report')
+    parser.add_argument('--prune-report', type=int, nargs='+', metavar='K',
+                        help='Report held-out accuracy and latency when keeping the top K features')
+    args = parser.parse_args()
+
+    base_dir = DEFAULT_DATA_DIR
+    gesture_types = GESTURE_TYPES
+    feature_set = args.feature_set
+
+    try:
+        print(f"Looking for gesture data in: {os.path.abspath(base_dir)}")
         
-        for file in files:
-            with open(os.path.join(data_dir, file)) as f:
-                try:
-                    sample = json.load(f)
-                    if "landmarks" not in sample:
-                        print(f"Warning: No landmarks found in {file}, skipping...")
-                        continue
-                        
-                    landmarks = sample["landmarks"]
-                    
-                    # Add original sample
-                    flat = [coord for point in landmarks for coord in point]
-                    X.append(flat)
-                    y.append(gesture_type)
-                    
-                    # Add augmented positive samples (small variations)
-                    for _ in range(2):
-                        augmented = augment_sample(landmarks)
-                        flat_aug = [coord for point in augmented for coord in point]
-                        X.append(flat_aug)
-                        y.append(gesture_type)
-                        
-                except json.JSONDecodeError:
-                    print(f"Warning: Could not parse JSON in {file}, skipping...")
-                    continue
-
-    if not X:
-        raise ValueError("No valid samples were loaded")
-
-    X = np.array(X)
-    y = np.array(y)
-    
-    print(f"\nTotal samples after augmentation: {len(X)}")
-    for gesture in gesture_types:
-        print(f"{gesture} gestures: {sum(y == gesture)}")
-
-    # Standardize features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # Encode labels
-    le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
-
-    # Train-test split with stratification
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y_encoded, 
-        test_size=0.2, 
-        random_state=42,
-        stratify=y_encoded
-    )
-
-    # Use Random Forest for better generalization
-    clf = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        class_weight='balanced',
-        random_state=42
-    )
-
-    # Train model
-    clf.fit(X_train, y_train)
-
-    # Evaluate on test set
-    y_pred = clf.predict(X_test)
-    test_acc = accuracy_score(y_test, y_pred)
-    print(f"\nTest set accuracy: {test_acc:.2f}")
-    
-    # Print detailed metrics
-    print("\nClassification Report:")
-    print(classification_report(y_test, y_pred, target_names=le.classes_))
-
-    # Feature importance analysis
-    feature_importance = clf.feature_importances_
-    top_n = 10
-    top_indices = np.argsort(feature_importance)[-top_n:]
-    print(f"\nTop {top_n} most important landmarks:")
-    for idx in top_indices:
-        point_idx = idx // 3
-        coord_idx = idx % 3
-        coord_name = ['x', 'y', 'z'][coord_idx]
-        print(f"Point {point_idx} {coord_name}: {feature_importance[idx]:.4f}")
-
-    # Save model, scaler, and label encoder
-    os.makedirs("models", exist_ok=True)
-    model_path = os.path.join("models", "gesture_model.pkl")
-    scaler_path = os.path.join("models", "scaler.pkl")
-    label_encoder_path = os.path.join("models", "label_encoder.pkl")
-    
-    joblib.dump(clf, model_path)
-    joblib.dump(scaler, scaler_path)
-    joblib.dump(le, label_encoder_path)
-    print("\nSaved files:")
-    print(f"Model: {model_path}")
-    print(f"Scaler: {scaler_path}")
-    print(f"Label Encoder: {label_encoder_path}")
-
-    # Verify the model works
-    print("\nVerifying model predictions...")
-    # Test on original sample
-    test_idx = 0
-    test_sample = X[test_idx:test_idx+1]
-    test_scaled = scaler.transform(test_sample)
-    test_proba = clf.predict_proba(test_scaled)[0]
-    print(f"Original {y[test_idx]} gesture confidence: {test_proba[le.transform([y[test_idx]])[0]]:.2f}")
-    
-    # Test on negative sample
-    neg_idx = np.where(y != y[test_idx])[0][0]
-    neg_sample = X[neg_idx:neg_idx+1]
-    neg_scaled = scaler.transform(neg_sample)
-    neg_proba = clf.predict_proba(neg_scaled)[0]
-    print(f"Negative {y[neg_idx]} gesture confidence: {neg_proba[le.transform([y[neg_idx]])[0]]:.2f}")
-
-except Exception as e:
-    print(f"Error: {str(e)}")
-    raise
+        train_samples, train_labels, val_samples, val_labels = load_gesture_split(base_dir, gesture_types)
+        if len(train_samples) == 0 or len(val_samples) == 0:
+            raise ValueError("No valid samples were loaded")
+
+        # Training samples are augmented; the fixed validation split is tested as recorded
+        X_train_raw, y_train_raw = build_training_matrix(train_samples, train_labels)
+        X = np.concatenate([X_train_raw, np.asarray(val_samples, dtype=np.float64).reshape(len(val_samples), -1)])
+        y = np.concatenate([y_train_raw, val_labels])
+        
+        print(f"\nTotal samples after augmentation: {len(X)}")
+        for gesture in gesture_types:
+            print(f"{gesture} gestures: {sum(y == gesture)}")
+
+        # Standardize features
+        features = compute_features(X, feature_set)
+        if args.top_k is not None and not 0 < args.top_k <= features.shape[1]:
+            raise ValueError(f"--top-k must be between 1 and {features.shape[1]}")
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(features)
+
+        # Encode labels
+        le = LabelEncoder()
+        y_encoded = le.fit_transform(y)
+
+        # Test on the fixed validation split, which no personalized or distilled model trains on either
+        train_idx = np.arange(len(X_train_raw))
+        test_idx = np.arange(len(X_train_raw), len(X))
+        X_train, X_test = X_scaled[train_idx], X_scaled[test_idx]
+        y_train, y_test = y_encoded[train_idx], y_encoded[test_idx]
+
+        # Use Random Forest for better generalization
+        clf = RandomForestClassifier(**FOREST_PARAMS)
+
+        # Train model
+        clf.fit(X_train, y_train)
+
+        # Evaluate on test set
+        y_pred = clf.predict(X_test)
+        test_acc = accuracy_score(y_test, y_pred)
+        print(f"\nTest set accuracy: {test_acc:.2f}")
+        
+        # Print detailed metrics
+        print("\nClassification Report:")
+        print(classification_report(y_test, y_pred, target_names=le.classes_))
+
+        # Feature importance analysis
+        feature_importance = feature_importances(clf, X_test, y_test, args.importance)
+        ranking = np.argsort(feature_importance)[::-1]
+        top_n = 10
+        print(f"\nTop {top_n} most important {feature_set} features ({args.importance}):")
+        for idx in ranking[:top_n]:
+            print(f"{feature_name(idx, feature_set)}: {feature_importance[idx]:.4f}")
+
+        if args.prune_report:
+            prune_report(X, features, y_encoded, train_idx, test_idx, ranking, args.prune_report,
+                         le.classes_, feature_set)
+
+        # Keep only the top k columns; predict_live then gathers and scales just those
+        feature_columns = None
+        if args.top_k is not None and args.top_k < features.shape[1]:
+            feature_columns = np.sort(ranking[:args.top_k])
+            scaler, clf = fit_on_columns(features, y_encoded, train_idx, feature_columns)
+            test_acc = accuracy_score(y_test, clf.predict(scaler.transform(features[test_idx][:, feature_columns])))
+            print(f"\nTest set accuracy with the top {args.top_k} features: {test_acc:.2f}")
+
+        # Save model, scaler, and label encoder
+        os.makedirs("models", exist_ok=True)
+        model_path = os.path.join("models", "gesture_model.pkl")
+        scaler_path = os.path.join("models", "scaler.pkl")
+        label_encoder_path = os.path.join("models", "label_encoder.pkl")
+        bundle_path = os.path.join("models", "gesture_model.bundle")
+        
+        joblib.dump(clf, model_path)
+        joblib.dump(scaler, scaler_path)
+        joblib.dump(le, label_encoder_path)
+        # bundle_from_pickles and benchmark_forest_engine.py read the features the pickles take from here
+        raw_scale = landmark_scale(X, feature_set, feature_columns)
+        save_pickle_features("models", feature_set, feature_columns, raw_scale)
+
+        # Pose codes that decide the gesture on their own skip the forest in predict_live.py
+        rule_table = learn_rule_table(X[train_idx], y_train, len(le.classes_))
+        print(f"\nFinger rules: {rule_table_summary(rule_table, le.classes_)}")
+
+        # Single memory-mappable artifact used by predict_live.py
+        bundle = ModelBundle.from_sklearn(clf, scaler, le.classes_, rule_table=rule_table,
+                                          feature_set=feature_set, feature_columns=feature_columns,
+                                          landmark_scale=raw_scale, metadata={
+            "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "n_samples": int(len(X)),
+            "test_accuracy": float(test_acc),
+            "n_estimators": clf.n_estimators,
+            "max_depth": clf.max_depth,
+            "n_features": int(clf.n_features_in_),
+        })
+        bundle.save(bundle_path)
+
+        print("\nSaved files:")
+        print(f"Model: {model_path}")
+        print(f"Scaler: {scaler_path}")
+        print(f"Label Encoder: {label_encoder_path}")
+        print(f"Pickle Features: {os.path.join('models', PICKLE_FEATURES_NAME)}")
+        print(f"Model Bundle: {bundle_path}")
+
+        # Verify the model works
+        print("\nVerifying model predictions...")
+        # Test on original sample
+        sample_idx = 0
+        test_sample = X[sample_idx:sample_idx+1]
+        test_scaled = bundle.featurize(test_sample)
+        test_proba = clf.predict_proba(test_scaled)[0]
+        print(f"Original {y[sample_idx]} gesture confidence: {test_proba[le.transform([y[sample_idx]])[0]]:.2f}")
+        
+        # Test on negative sample
+        neg_idx = np.where(y != y[sample_idx])[0][0]
+        neg_sample = X[neg_idx:neg_idx+1]
+        neg_scaled = bundle.featurize(neg_sample)
+        neg_proba = clf.predict_proba(neg_scaled)[0]
+        print(f"Negative {y[neg_idx]} gesture confidence: {neg_proba[le.transform([y[neg_idx]])[0]]:.2f}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ import autopy
 import pyautogui    # <— new import
 import time
 
+from hand_tracking import RoiHandTracker
+from frame_controller import FrameController
+
 # === Configuration ===
 CAM_WIDTH, CAM_HEIGHT = 640, 480
 FRAME_REDUCTION     = 100
@@ -15,16 +18,17 @@ SMOOTHENING         = 7
 CLICK_THRESHOLD     = 40
 ZOOM_THRESHOLD      = 10    # px change to trigger a scroll
 SCROLL_FACTOR       = 20    # how many “clicks” per step
+LATENCY_BUDGET_MS   = 33.0  # per frame; resolution/model/stride step down to fit it
 
 # Init camera
 cap = cv2.VideoCapture(0, cv2.CAP_DSHOW if hasattr(cv2,'CAP_DSHOW') else 0)
 cap.set(cv2.CAP_PROP_FRAME_WIDTH,  CAM_WIDTH)
 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAM_HEIGHT)
 
-# Mediapipe hands (up to 2)
+# Mediapipe hands (up to 2), run on a tracked crop around the hands
 mp_hands = mp.solutions.hands
 mp_draw  = mp.solutions.drawing_utils
-hands    = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.7)
+hands    = RoiHandTracker(max_num_hands=2, min_detection_confidence=0.7)
 
 # Screen size for cursor mapping
 screen_w, screen_h = autopy.screen.size()
@@ -44,14 +48,22 @@ def fingers_up(lm):
         st.append(1 if lm[id].y < lm[id-2].y else 0)
     return st
 
+# Quality (resolution, landmark model, frame stride) within the latency budget,
+# idle power tiers, motion gating, latency histograms and the cProfile trigger.
+# Cursor math stays in CAM_WIDTH x CAM_HEIGHT space (landmarks are normalized).
+controller  = FrameController("air-controller", cap, hands, LATENCY_BUDGET_MS)
+
 while True:
-    ret, frame = cap.read()
+    ret, frame = controller.begin_frame()
     if not ret:
         break
+    if frame is None:  # Skipped by the frame stride
+        cv2.waitKey(1)
+        continue
 
     img     = cv2.flip(frame,1)
     img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    res     = hands.process(img_rgb)
+    res, skipped = controller.process(img_rgb)
 
     hand_count = len(res.multi_hand_landmarks) if res.multi_hand_landmarks else 0
 
@@ -129,12 +141,16 @@ while True:
         zoom_prev_dist = None
         palm_click_pending = False
 
-    # draw movement boundary
+    # draw movement boundary (grey while hand detection is paused)
+    idle = skipped and hand_count == 0
+    fx, fy = img.shape[1]/CAM_WIDTH, img.shape[0]/CAM_HEIGHT
     cv2.rectangle(img,
-                  (FRAME_REDUCTION, FRAME_REDUCTION),
-                  (CAM_WIDTH-FRAME_REDUCTION,
-                   CAM_HEIGHT-FRAME_REDUCTION),
-                  (255,0,255), 2)
+                  (int(FRAME_REDUCTION*fx), int(FRAME_REDUCTION*fy)),
+                  (int((CAM_WIDTH-FRAME_REDUCTION)*fx),
+                   int((CAM_HEIGHT-FRAME_REDUCTION)*fy)),
+                  (128,128,128) if idle else (255,0,255), 2)
+
+    controller.end_frame(hand_count)
 
     cv2.imshow("Touchless Virtual Mouse", img)
     if cv2.waitKey(1) & 0xFF == 27:
@@ -142,3 +158,4 @@ while True:
 
 cap.release()
 cv2.destroyAllWindows()
+controller.close()
@@ -0,0 +1,102 @@
+import time
+import cv2
+
+from motion_gate import MotionGate
+from qos_governor import QosGovernor, describe_level
+from power_states import PowerManager, drain_capture
+from latency_stats import PipelineStats, ProfileTrigger
+
+
+class FrameController:
+    """Capture pacing, quality and power control shared by the camera loops.
+
+    Owns the QoS governor (resolution, landmark model and frame stride
+    within `budget_ms` per frame), the power tiers, the motion gate in
+    front of `hands`, the latency histograms in `RUNTIME_DIR/<name>-latency.json`
+    and the SIGUSR1 / `RUNTIME_DIR/<name>.profile` cProfile trigger; it is
+    the only code that changes the capture settings.
+
+    Each loop iteration calls `begin_frame()`, runs `process(rgb)` for the
+    hand landmarks and finishes with `end_frame(hand_count)`:
+
+        ret, frame = controller.begin_frame()
+        if not ret:
+            break
+        if frame is None:  # Skipped by the frame stride
+            continue
+    """
+
+    def __init__(self, name, cap, hands, budget_ms=33.0):
+        self.cap = cap
+        self.hands = hands
+        # Skip MediaPipe while the scene is empty and static
+        self.motion_gate = MotionGate(hands)
+        self.governor = QosGovernor(budget_ms)
+        # Low frame rate and resolution after a while without hands (state for app.py)
+        self.power = PowerManager(name)
+        self.stats = PipelineStats(name)
+        self.profiler = ProfileTrigger(name)
+        self.frame_index = 0
+        self.frame_started = 0.0
+
+    def begin_frame(self):
+        """Read the next frame: (False, None) when the camera fails, (True, None) for a stride skip"""
+        self.power.throttle()
+        read_started = time.perf_counter()
+        ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+        self.stats.record("capture", time.perf_counter() - read_started)
+
+        self.frame_index += 1
+        if self.power.active and self.frame_index % self.governor.level.frame_stride:
+            self.stats.count("stride_skipped")
+            return True, None
+        self.frame_started = time.perf_counter()
+        return True, frame
+
+    def process(self, rgb):
+        """Motion-gated hand landmarks of an RGB frame, as (results, skipped)"""
+        hands_started = time.perf_counter()
+        results, skipped = self.motion_gate.process(rgb)
+        if skipped:
+            self.stats.count("hands_skipped")
+        else:
+            self.stats.record("hands", time.perf_counter() - hands_started)
+        return results, skipped
+
+    def end_frame(self, hand_count):
+        """Record the frame's cost and apply quality or power changes it triggers"""
+        # Step quality up or down when the frame cost leaves the budget
+        frame_cost = time.perf_counter() - self.frame_started
+        self.governor.record("frame", frame_cost)
+        self.stats.record("frame", frame_cost)
+        self.profiler.poll()
+        self.stats.maybe_dump()
+        level = self.governor.update() if self.power.active else None
+        if level is not None:
+            self.set_resolution(level.width, level.height)
+            self.hands.set_model_complexity(level.model_complexity)
+            self.motion_gate.reset()
+            print(f"Quality -> {describe_level(level)}")
+
+        # Idle tiers drop the resolution and camera frame rate; a hand restores them at once
+        tier = self.power.update(hand_count > 0)
+        if tier is not None:
+            level = self.governor.level
+            self.set_resolution(tier.width or level.width, tier.height or level.height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.power.camera_fps)
+            if self.power.active:
+                # The frames buffered at the idle rate are up to seconds old
+                drain_capture(self.cap)
+            print(f"Power state -> {tier.name}")
+
+    def set_resolution(self, width, height):
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def close(self):
+        print(self.motion_gate.summary())
+        self.power.close()
+        self.profiler.close()
+        self.stats.maybe_dump(force=True)
@@ -0,0 +1,259 @@
+import os
+import json
+import math
+import time
+import signal
+import cProfile
+from contextlib import contextmanager
+import numpy as np
+
+from power_states import RUNTIME_DIR
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram with logarithmic buckets (HDR-style).
+
+    Bucket `i` covers [lowest * growth**i, lowest * growth**(i+1)), so every
+    recorded value is kept with a relative error below `growth - 1` (2% by
+    default) from 1 us up to `highest` seconds, in under a thousand int64
+    counters. Recording is one log and one increment; nothing grows with
+    the number of samples.
+    """
+
+    def __init__(self, lowest=1e-6, highest=60.0, growth=1.02):
+        self.lowest = lowest
+        self.log_growth = math.log(growth)
+        self.growth = growth
+        self.n_buckets = int(math.ceil(math.log(highest / lowest) / self.log_growth)) + 1
+        self.counts = np.zeros(self.n_buckets, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.counts[...] = 0
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= self.lowest:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / self.lowest) / self.log_growth), self.n_buckets - 1)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (0-100), in seconds"""
+        if self.total == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.total)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.lowest * self.growth ** (index + 1), self.max)
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum / self.total * 1000, 3) if self.total else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PipelineStats:
+    """Per-stage latency histograms and event counters for one camera process.
+
+    Stages are timed with `stage(name)` or `record(name, seconds)`, drops
+    and skips are counted with `count(name)`. `maybe_dump()` (called from
+    the loop) writes the histograms of the last `dump_interval` seconds and
+    the running counters to `RUNTIME_DIR/<name>-latency.json`, then starts
+    a new interval. Each stage is recorded from a single thread; a sample
+    racing with the reset at the end of an interval may be lost, which is
+    acceptable for monitoring and keeps the hot path lock-free.
+    """
+
+    def __init__(self, name, dump_interval=10.0, state_dir=RUNTIME_DIR):
+        self.name = name
+        self.dump_path = os.path.join(state_dir, f"{name}-latency.json")
+        self.dump_interval = dump_interval
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.monotonic()
+        self.interval_started = self.started
+        os.makedirs(state_dir, exist_ok=True)
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        histogram.record(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_counter(self, name, value):
+        """For counts kept elsewhere, e.g. LatestFrameQueue.dropped"""
+        self.counters[name] = value
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "process": self.name,
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "uptime_seconds": round(now - self.started, 1),
+            "interval_seconds": round(now - self.interval_started, 1),
+            "stages": {name: h.summary() for name, h in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def maybe_dump(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.interval_started < self.dump_interval:
+            return False
+        snapshot = self.snapshot()
+        tmp_path = f"{self.dump_path}.tmp{os.getpid()}"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp_path, self.dump_path)
+        except OSError as e:
+            print(f"❌ Failed to write latency stats: {str(e)}")
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+        self.interval_started = now
+        return True
+
+
+class ProfileTrigger:
+    """Captures a short cProfile window from a running process on request.
+
+    Send SIGUSR1 (POSIX) or create `RUNTIME_DIR/<name>.profile` to start a
+    `duration`-second profile; `poll()` must be called regularly from the
+    thread that drives the loop. The result is written next to the flag
+    file as `<name>-<timestamp>.prof`, readable with pstats/snakeviz.
+
+    cProfile only sees the thread that enabled it, so worker threads take
+    a `thread_profiler(label)` and poll it from their own loop; they
+    profile the same window into `<name>-<timestamp>-<label>.prof`.
+    `pstats.Stats(*paths)` combines the files into one view.
+    """
+
+    def __init__(self, name, duration=10.0, state_dir=RUNTIME_DIR, check_interval=1.0):
+        self.name = name
+        self.duration = duration
+        self.state_dir = state_dir
+        self.flag_path = os.path.join(state_dir, f"{name}.profile")
+        self.check_interval = check_interval
+        self.last_check = 0.0
+        self.requested = False
+        self.profiler = None
+        self.profile_started = 0.0
+        # Window that thread profilers join: its number, end time and file stamp
+        self.session = 0
+        self.session_ends = 0.0
+        self.session_stamp = None
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                signal.signal(signal.SIGUSR1, self._on_signal)
+            except ValueError:
+                pass  # Not the main thread; the flag file still works
+
+    def _on_signal(self, signum, frame):
+        self.requested = True
+
+    def thread_profiler(self, label):
+        """Profiler for a worker thread, polled from that thread like `poll()`"""
+        return ThreadProfiler(self, label)
+
+    def profile_path(self, label=None):
+        suffix = f"-{label}" if label else ""
+        return os.path.join(self.state_dir, f"{self.name}-{self.session_stamp}{suffix}.prof")
+
+    def poll(self):
+        now = time.monotonic()
+        if self.profiler is not None:
+            if now - self.profile_started >= self.duration:
+                self._finish()
+            return
+        if not self.requested and now - self.last_check >= self.check_interval:
+            self.last_check = now
+            if os.path.exists(self.flag_path):
+                try:
+                    os.remove(self.flag_path)
+                except OSError:
+                    pass
+                self.requested = True
+        if self.requested:
+            self.requested = False
+            self.profiler = cProfile.Profile()
+            self.profile_started = now
+            self.session_stamp = time.strftime('%Y%m%d-%H%M%S')
+            self.session_ends = now + self.duration
+            self.session += 1
+            self.profiler.enable()
+            print(f"🔬 Profiling for {self.duration:.0f}s...")
+
+    def _finish(self):
+        self.profiler.disable()
+        self.session_ends = 0.0
+        write_profile(self.profiler, self.profile_path())
+        self.profiler = None
+
+    def close(self):
+        if self.profiler is not None:
+            self._finish()
+
+
+class ThreadProfiler:
+    """The part of a ProfileTrigger window that runs on one worker thread.
+
+    `poll()` and `close()` must only be called from that thread.
+    """
+
+    def __init__(self, trigger, label):
+        self.trigger = trigger
+        self.label = label
+        self.session = 0
+        self.profiler = None
+
+    def poll(self):
+        trigger = self.trigger
+        if self.profiler is not None:
+            if time.monotonic() >= trigger.session_ends or trigger.session != self.session:
+                self._finish()
+            return
+        if trigger.session != self.session and time.monotonic() < trigger.session_ends:
+            self.session = trigger.session
+            self.path = trigger.profile_path(self.label)
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def _finish(self):
+        self.profiler.disable()
+        write_profile(self.profiler, self.path)
+        self.profiler = None
+
+    def close(self):
+        if self.profiler is not None:
+            self._finish()
+
+
+def write_profile(profiler, path):
+    try:
+        profiler.dump_stats(path)
+        print(f"🔬 Profile written to {path}")
+    except OSError as e:
+        print(f"❌ Failed to write profile: {str(e)}")
@@ -0,0 +1,105 @@
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Skips hand inference on frames that cannot change its result.
+
+    Each frame is downscaled to a small grayscale image and compared with
+    the frame the last inference ran on and with a slowly updated background
+    model. Inference is skipped when
+
+    * no hand is visible, none was seen for `hand_hold` seconds, and the
+      scene neither moved nor differs from the background (empty room), or
+    * a hand is visible but nothing moved since its landmarks were computed,
+      in which case the previous result is returned again.
+
+    Skips are capped (`max_idle_skip`, `max_still_reuse`) so slow changes
+    are still picked up. `process` returns `(results, skipped)`.
+    """
+
+    def __init__(self, hands, size=(80, 60), pixel_threshold=15, motion_fraction=0.004,
+                 presence_fraction=0.02, background_rate=0.02, hand_hold=1.0,
+                 max_still_reuse=5, max_idle_skip=30, clock=time.monotonic):
+        self.hands = hands
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.presence_fraction = presence_fraction
+        self.background_rate = background_rate
+        self.hand_hold = hand_hold
+        self.max_still_reuse = max_still_reuse
+        self.max_idle_skip = max_idle_skip
+        self.clock = clock
+
+        width, height = size
+        self.n_pixels = width * height
+        self.small = np.zeros((height, width, 3), dtype=np.uint8)
+        self.gray = np.zeros((height, width), dtype=np.uint8)
+        self.reference = np.zeros((height, width), dtype=np.uint8)
+        self.background = np.zeros((height, width), dtype=np.float32)
+        self.background_u8 = np.zeros((height, width), dtype=np.uint8)
+        self.diff = np.zeros((height, width), dtype=np.uint8)
+
+        self.last_results = None
+        self.last_hand_time = float("-inf")
+        self.consecutive_skips = 0
+        self.frames = 0
+        self.skipped_frames = 0
+
+    def _changed_fraction(self, reference):
+        cv2.absdiff(self.gray, reference, dst=self.diff)
+        cv2.threshold(self.diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+        return cv2.countNonZero(self.diff) / self.n_pixels
+
+    def _should_skip(self, now):
+        if self.last_results is None:
+            return False
+        motion = self._changed_fraction(self.reference)
+        if motion >= self.motion_fraction:
+            return False
+        if self.last_results.multi_hand_landmarks:
+            # The hand is still: its landmarks cannot have changed
+            return self.consecutive_skips < self.max_still_reuse
+        if now - self.last_hand_time < self.hand_hold:
+            return False
+        cv2.convertScaleAbs(self.background, dst=self.background_u8)
+        presence = self._changed_fraction(self.background_u8)
+        return presence < self.presence_fraction and self.consecutive_skips < self.max_idle_skip
+
+    def process(self, rgb_frame):
+        """Run `hands.process` unless the gate proves it unnecessary"""
+        now = self.clock()
+        self.frames += 1
+        cv2.resize(rgb_frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_RGB2GRAY, dst=self.gray)
+
+        if self._should_skip(now):
+            self.consecutive_skips += 1
+            self.skipped_frames += 1
+            results = self.last_results
+            skipped = True
+        else:
+            results = self.hands.process(rgb_frame)
+            np.copyto(self.reference, self.gray)
+            if self.last_results is None:
+                self.background[...] = self.gray
+            self.last_results = results
+            self.consecutive_skips = 0
+            skipped = False
+
+        if results.multi_hand_landmarks:
+            self.last_hand_time = now
+        else:
+            # Only learn the background while no hand is in view
+            cv2.accumulateWeighted(self.gray, self.background, self.background_rate)
+        return results, skipped
+
+    def reset(self):
+        """Forget the cached result so the next frame always runs inference"""
+        self.last_results = None
+        self.consecutive_skips = 0
+
+    def summary(self):
+        return f"Motion gate skipped {self.skipped_frames} of {self.frames} frames"
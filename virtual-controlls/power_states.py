@@ -0,0 +1,144 @@
+import os
+import json
+import time
+from collections import namedtuple
+
+# State files of running camera processes, read by app.py's /power_states endpoint
+RUNTIME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime")
+
+PowerTier = namedtuple("PowerTier", "name idle_after fps width height")
+
+# Deeper tiers after longer stretches without a hand; None means "whatever
+# the loop would normally use" (full frame rate, the governor's resolution)
+POWER_TIERS = (
+    PowerTier("active", 0, None, None, None),
+    PowerTier("idle", 30, 10, 320, 240),
+    PowerTier("sleep", 300, 2, 320, 240),
+)
+
+# Camera frame rate requested while a tier leaves the rate to the loop
+ACTIVE_CAMERA_FPS = 30
+
+# drain_capture: at most this many frames, stopping at the first grab slower
+# than DRAIN_FRESH_AFTER seconds (it waited for a new frame, so the buffer is empty)
+DRAIN_MAX_FRAMES = 8
+DRAIN_FRESH_AFTER = 0.005
+
+
+class PowerManager:
+    """Tracks how long no hand has been seen and picks a power tier for the capture loop.
+
+    `update(hand_visible)` is called once per processed frame and returns
+    the new tier when it changed, so the caller can apply its resolution;
+    a visible hand always returns to the first tier immediately. Idle
+    tiers throttle the loop to a low frame rate via `throttle()` (or
+    `frame_interval` for a capture thread); the caller also asks the
+    camera for `camera_fps` on every change and, when returning to the
+    first tier, discards the stale frames it buffered with
+    `drain_capture`. The current state is written
+    to `RUNTIME_DIR/<name>.json` on every change and every `heartbeat`
+    seconds.
+    """
+
+    def __init__(self, name, tiers=POWER_TIERS, state_dir=RUNTIME_DIR, heartbeat=5.0,
+                 clock=time.monotonic, active_fps=ACTIVE_CAMERA_FPS):
+        self.name = name
+        self.tiers = tiers
+        self.active_fps = active_fps
+        self.state_path = os.path.join(state_dir, f"{name}.json")
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self.tier = tiers[0]
+        now = clock()
+        self.last_hand = now
+        self.since = time.time()
+        self.last_write = float("-inf")
+        self.next_frame = now
+        os.makedirs(state_dir, exist_ok=True)
+
+    @property
+    def active(self):
+        return self.tier is self.tiers[0]
+
+    @property
+    def frame_interval(self):
+        return 1.0 / self.tier.fps if self.tier.fps else 0.0
+
+    @property
+    def camera_fps(self):
+        """CAP_PROP_FPS for the current tier"""
+        return self.tier.fps or self.active_fps
+
+    def update(self, hand_visible):
+        now = self.clock()
+        if hand_visible:
+            self.last_hand = now
+            target = self.tiers[0]
+        else:
+            idle_for = now - self.last_hand
+            target = [tier for tier in self.tiers if tier.idle_after <= idle_for][-1]
+
+        changed = target is not self.tier
+        if changed:
+            self.tier = target
+            self.since = time.time()
+            self.next_frame = now
+        if changed or now - self.last_write >= self.heartbeat:
+            self.write_state(now)
+        return target if changed else None
+
+    def throttle(self):
+        """Sleep until the current tier's next frame slot (no-op while active)"""
+        interval = self.frame_interval
+        if not interval:
+            return
+        self.next_frame += interval
+        delay = self.next_frame - self.clock()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self.next_frame = self.clock()
+
+    def write_state(self, now=None):
+        now = self.clock() if now is None else now
+        state = {
+            "process": self.name,
+            "pid": os.getpid(),
+            "state": self.tier.name,
+            "since": self.since,
+            "seconds_without_hand": round(now - self.last_hand, 1),
+            "fps_limit": self.tier.fps,
+            "updated": time.time(),
+        }
+        tmp_path = f"{self.state_path}.tmp{os.getpid()}"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"❌ Failed to write power state: {str(e)}")
+        self.last_write = now
+
+    def close(self):
+        """Remove the state file; the process is no longer running"""
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+
+def drain_capture(cap, max_frames=DRAIN_MAX_FRAMES, fresh_after=DRAIN_FRESH_AFTER):
+    """Grab and discard the frames a cv2.VideoCapture buffered while the loop was throttled.
+
+    Buffered frames return at once, so draining stops at the first grab that
+    had to wait for the camera. Returns the number of frames discarded.
+    """
+    drained = 0
+    for _ in range(max_frames):
+        started = time.perf_counter()
+        if not cap.grab():
+            break
+        drained += 1
+        if time.perf_counter() - started > fresh_after:
+            break
+    return drained
@@ -0,0 +1,102 @@
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+QualityLevel = namedtuple("QualityLevel", "width height model_complexity frame_stride")
+
+# Cheapest last; each step should cost noticeably less than the one above it
+QUALITY_LEVELS = (
+    QualityLevel(640, 480, 1, 1),
+    QualityLevel(640, 480, 1, 2),
+    QualityLevel(640, 480, 0, 2),
+    QualityLevel(480, 360, 0, 2),
+    QualityLevel(320, 240, 0, 2),
+    QualityLevel(320, 240, 0, 3),
+)
+
+
+def describe_level(level):
+    stride = "every frame" if level.frame_stride == 1 else f"every {level.frame_stride} frames"
+    return f"{level.width}x{level.height}, model_complexity {level.model_complexity}, {stride}"
+
+
+class QosGovernor:
+    """Picks a quality level that keeps per-frame latency inside a budget.
+
+    Callers time their stages with `stage(name)` (or `record`) and call
+    `update()` once per processed frame. At most every `interval` seconds,
+    once every stage has a full window of samples, the frame cost (the
+    `quantile` of each stage's latencies, summed for a sequential loop or
+    the slowest stage for a pipelined one) is compared with the budget
+    scaled by the frame stride. Over budget steps one level down; below
+    `headroom` of the next level's budget steps one level up. A high
+    quantile keeps cheap frames (motion-gated, no hand) from hiding the
+    cost of real ones.
+    """
+
+    def __init__(self, budget_ms=33.0, levels=QUALITY_LEVELS, start_level=0, parallel=False,
+                 window=30, interval=2.0, quantile=0.9, headroom=0.6, clock=time.monotonic):
+        self.budget = budget_ms / 1000.0
+        self.levels = levels
+        self.index = start_level
+        self.parallel = parallel
+        self.window = window
+        self.interval = interval
+        self.quantile = quantile
+        self.headroom = headroom
+        self.clock = clock
+        self.samples = {}
+        self.last_change = clock()
+        self.changes = 0
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def record(self, stage, seconds):
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples.setdefault(stage, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def _stage_cost(self, samples):
+        ordered = sorted(samples)
+        return ordered[int(self.quantile * (len(ordered) - 1))]
+
+    def frame_cost(self):
+        """Estimated seconds per processed frame, or None until every stage has a full window"""
+        stages = list(self.samples.values())
+        if not stages or any(len(samples) < self.window for samples in stages):
+            return None
+        costs = [self._stage_cost(samples) for samples in stages]
+        return max(costs) if self.parallel else sum(costs)
+
+    def update(self):
+        """Re-evaluate the quality level; returns the new level when it changed, else None"""
+        now = self.clock()
+        if now - self.last_change < self.interval:
+            return None
+        cost = self.frame_cost()
+        if cost is None:
+            return None
+
+        if cost > self.budget * self.level.frame_stride and self.index < len(self.levels) - 1:
+            self.index += 1
+        elif self.index > 0 and cost < self.headroom * self.budget * self.levels[self.index - 1].frame_stride:
+            self.index -= 1
+        else:
+            return None
+
+        # Measurements from the old level say nothing about the new one
+        self.samples = {}
+        self.last_change = now
+        self.changes += 1
+        return self.level